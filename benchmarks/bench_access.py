@@ -0,0 +1,38 @@
+"""Benchmark reading a nested key from ResConfig repeatedly.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_access.py
+"""
+import timeit
+
+from resconfig import ResConfig
+
+
+def bench_access(number=200000):
+    config = ResConfig({f"a{i}": {"b": {"c": i, "d": {"e": i}}} for i in range(100)})
+    accessor = config.accessor("a50.b.c")
+    accessor_node = config.accessor("a50.b")
+
+    print(f"reads x {number}")
+    for name, stmt in (
+        ('config["a50.b.c"]', lambda: config["a50.b.c"]),
+        ('config.get("a50.b.c")', lambda: config.get("a50.b.c")),
+        (
+            'config.get("a50.b.c", copy=False)',
+            lambda: config.get("a50.b.c", copy=False),
+        ),
+        ('config.get_int("a50.b.c")', lambda: config.get_int("a50.b.c")),
+        (
+            'config.get_int("a50.b.c", cast=True)',
+            lambda: config.get_int("a50.b.c", cast=True),
+        ),
+        ('config.accessor("a50.b.c")()', accessor),
+        ('config.accessor("a50.b")()', accessor_node),
+    ):
+        elapsed = min(timeit.repeat(stmt, number=number, repeat=3))
+        print(f"  {name}: {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    bench_access()
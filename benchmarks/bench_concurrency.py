@@ -0,0 +1,65 @@
+"""Benchmark read throughput of ResConfig under concurrent reloads.
+
+Reader threads repeatedly read a key while a writer thread reloads the config
+periodically, in each concurrency mode.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_concurrency.py
+"""
+import threading
+import time
+
+from resconfig import ResConfig
+
+DURATION = 1.0
+RELOAD_INTERVAL = 0.05
+
+
+def make_config(value, width=10):
+    return {
+        f"section{i}": {f"key{j}": value for j in range(width)} for i in range(width)
+    }
+
+
+def bench_reads(concurrency, threads):
+    configs = [make_config(i) for i in range(2)]
+    config = ResConfig(configs[0], concurrency=concurrency)
+    done = threading.Event()
+    counts = [0] * threads
+
+    def read(n):
+        count = 0
+        while not done.is_set():
+            for _ in range(100):
+                config.get("section0.key0")
+            count += 100
+        counts[n] = count
+
+    def write():
+        i = 0
+        while not done.wait(RELOAD_INTERVAL):
+            i += 1
+            config.replace(configs[i % 2])
+
+    readers = [threading.Thread(target=read, args=(n,)) for n in range(threads)]
+    writer = threading.Thread(target=write)
+    for t in readers + [writer]:
+        t.start()
+    time.sleep(DURATION)
+    done.set()
+    for t in readers + [writer]:
+        t.join()
+    return sum(counts) / DURATION
+
+
+def main():
+    for concurrency in (None, "lock", "copy-on-write"):
+        print(f"concurrency={concurrency!r}")
+        for threads in (1, 4, 16):
+            reads = bench_reads(concurrency, threads)
+            print(f"  {threads:2d} reader threads: {reads:,.0f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
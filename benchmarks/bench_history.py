@@ -0,0 +1,52 @@
+"""Benchmark the memory and time taken by the config history and rollback().
+
+Run from the repository root::
+
+    $ python benchmarks/bench_history.py
+"""
+import time
+import tracemalloc
+
+from resconfig import ResConfig
+
+
+def make_config(leaves, width=10):
+    return {
+        f"section{i}": {
+            f"group{j}": {f"key{k}": k for k in range(width)} for j in range(width)
+        }
+        for i in range(leaves // width // width)
+    }
+
+
+def bench_history(leaves, history, changes=100):
+    config = ResConfig(make_config(leaves), history=history)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(changes):
+        config.update({f"section{i % 10}.group0.key0": -i})
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if not history:
+        return elapsed, memory, None
+    start = time.perf_counter()
+    config.rollback(history)
+    return elapsed, memory, time.perf_counter() - start
+
+
+def main():
+    for leaves in (10000, 100000):
+        print(f"100 one-key updates on {leaves} leaves")
+        for history in (0, 10, 100):
+            elapsed, memory, rollback = bench_history(leaves, history)
+            line = f"  history={history}: {elapsed:.3f} s, {memory / 1024:.0f} KiB"
+            if rollback is not None:
+                line += f", rollback({history}): {rollback * 1000:.2f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
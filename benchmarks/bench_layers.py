@@ -0,0 +1,48 @@
+"""Benchmark reloading a changed config file with load() and load_layer().
+
+Run from the repository root::
+
+    $ python benchmarks/bench_layers.py
+"""
+import os
+import tempfile
+import time
+
+from resconfig import ResConfig
+
+
+def make_config(leaves, width=10):
+    return {
+        f"section{i}": {
+            f"group{j}": {f"key{k}": k for k in range(width)} for j in range(width)
+        }
+        for i in range(leaves // width // width)
+    }
+
+
+def bench_reload(leaves, method):
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "conf.json")
+        ResConfig({"section0.group0.key0": 0}).save_to_file(filename)
+        config = ResConfig(make_config(leaves), config_files=[filename])
+
+        # Change the one section the config file has.
+        ResConfig({"section0.group0.key0": -1}).save_to_file(filename)
+        start = time.perf_counter()
+        if method == "load":
+            config.load()
+        else:
+            config.load_layer(filename)
+        return time.perf_counter() - start
+
+
+def main():
+    for leaves in (10000, 100000):
+        print(f"reload a config file on {leaves} leaves")
+        for method in ("load", "load_layer"):
+            elapsed = bench_reload(leaves, method)
+            print(f"  {method}(): {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
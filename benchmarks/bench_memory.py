@@ -0,0 +1,53 @@
+"""Benchmark the memory taken by nested configs with many small nodes.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_memory.py
+"""
+import gc
+import tracemalloc
+
+from resconfig.ondict import DictONDict
+from resconfig.ondict import IndexedONDict
+from resconfig.ondict import ONDict
+
+
+def tenants(n):
+    return {
+        f"tenant{i}": {
+            "limits": {"rate": i % 100, "burst": 10},
+            "flags": {"beta": i % 2},
+        }
+        for i in range(n)
+    }
+
+
+def measure(cls, d):
+    gc.collect()
+    tracemalloc.start()
+    obj = cls(d)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def bench_memory(sizes=(10000, 100000)):
+    print("memory of tenant overrides (3 nodes per tenant)")
+    for n in sizes:
+        d = tenants(n)
+        result = {
+            cls.__name__: measure(cls, d) for cls in (ONDict, DictONDict, IndexedONDict)
+        }
+        base = result["ONDict"]
+        print(
+            f"  {n} tenants: "
+            + ", ".join(
+                f"{name} {size / 2 ** 20:.1f} MiB ({size / base:.2f}x)"
+                for name, size in result.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    bench_memory()
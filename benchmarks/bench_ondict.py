@@ -0,0 +1,119 @@
+"""Benchmark nested key lookups on ONDict.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_ondict.py
+"""
+import re
+import timeit
+
+from resconfig import ondict
+from resconfig.ondict import IndexedONDict
+from resconfig.ondict import ONDict
+
+
+def make_tree(width=10, depth=4, cls=ONDict):
+    def build(level):
+        if level == depth:
+            return 0
+        return {f"k{i}": build(level + 1) for i in range(width)}
+
+    return cls(build(0))
+
+
+def bench_lookups(number=200000):
+    d = make_tree()
+    keys = [".".join(f"k{i % 10}" for _ in range(4)) for i in range(100)]
+
+    def lookup():
+        for key in keys:
+            d[key]
+
+    n = number // len(keys)
+    cached = min(timeit.repeat(lookup, number=n, repeat=5))
+
+    def splitkey_uncached(key):
+        return tuple(re.split(r"(?<!\\)\.", key)) if "." in key else (key,)
+
+    splitkey = ondict._splitkey
+    ondict._splitkey = splitkey_uncached
+    try:
+        uncached = min(timeit.repeat(lookup, number=n, repeat=5))
+    finally:
+        ondict._splitkey = splitkey
+
+    print(f"dotted key lookups x {number}")
+    print(f"  uncached: {uncached:.3f} s")
+    print(f"  cached:   {cached:.3f} s ({uncached / cached:.2f}x)")
+    print(f"  {ondict.keycache_info()}")
+
+
+def bench_indexed_lookups(number=200000):
+    print(f"lookups by depth x {number}")
+    for depth in (1, 4, 8):
+        width = 3 if depth == 8 else 10
+        keys = [".".join(f"k{i % width}" for _ in range(depth)) for i in range(100)]
+        n = number // len(keys)
+        result = []
+        for cls in (ONDict, IndexedONDict):
+            d = make_tree(width, depth, cls)
+
+            def lookup():
+                for key in keys:
+                    d[key]
+
+            result.append(min(timeit.repeat(lookup, number=n, repeat=5)))
+        print(
+            f"  depth {depth}: ONDict {result[0]:.3f} s, "
+            f"IndexedONDict {result[1]:.3f} s ({result[0] / result[1]:.2f}x)"
+        )
+
+
+def bench_construction(leaves=100000):
+    flags = {
+        f"flag{i}": {"enabled": bool(i % 2), "rollout": i % 100}
+        for i in range(leaves // 2)
+    }
+    dotted = {
+        f"flag{i // 2}.{'enabled' if i % 2 else 'rollout'}": i for i in range(leaves)
+    }
+
+    print(f"construction from {leaves} leaves")
+    for name, d in (("nested", flags), ("dotted", dotted)):
+
+        def merged():
+            ONDict().merge(d)
+
+        old = min(timeit.repeat(merged, number=1, repeat=3))
+        new = min(timeit.repeat(lambda: ONDict(d), number=1, repeat=3))
+        print(
+            f"  {name}: merge {old:.3f} s, single pass {new:.3f} s ({old / new:.2f}x)"
+        )
+    trusted = min(
+        timeit.repeat(
+            lambda: ONDict.from_mapping(flags, trusted=True), number=1, repeat=3
+        )
+    )
+    print(f"  nested, trusted: {trusted:.3f} s")
+
+
+def bench_fromkeys(sizes=(1000, 10000)):
+    print("fromkeys")
+    for size in sizes:
+        keys = [f"section{i % 100}.group{i % 7}.key{i}" for i in range(size)]
+
+        def merged():
+            dic = ONDict()
+            for key in keys:
+                dic = ondict.merge(dic, ondict.normalize({key: None}, cls=ONDict))
+
+        old = min(timeit.repeat(merged, number=1, repeat=3))
+        new = min(timeit.repeat(lambda: ONDict.fromkeys(keys), number=1, repeat=3))
+        print(f"  {size} keys: merge {old:.3f} s, from_items {new:.3f} s")
+
+
+if __name__ == "__main__":
+    bench_lookups()
+    bench_indexed_lookups()
+    bench_construction()
+    bench_fromkeys()
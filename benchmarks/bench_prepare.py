@@ -0,0 +1,43 @@
+"""Benchmark preparing the config to load from a large default config.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_prepare.py
+"""
+import os
+import time
+
+from resconfig import ResConfig
+
+
+def make_config(leaves, width=20):
+    return {
+        f"section{i}": {f"key{j}": j for j in range(width)}
+        for i in range(leaves // width)
+    }
+
+
+def bench_prepare(leaves, envvars, repeat=10):
+    config = ResConfig(make_config(leaves), envvar_prefix="BENCH_", load_on_init=False)
+    for i in range(envvars):
+        os.environ[f"BENCH_SECTION{i}_KEY0"] = "-1"
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            config._prepare_config()
+        return (time.perf_counter() - start) / repeat
+    finally:
+        for i in range(envvars):
+            del os.environ[f"BENCH_SECTION{i}_KEY0"]
+
+
+def main():
+    for leaves in (2000, 20000):
+        print(f"_prepare_config() on {leaves} leaves")
+        for envvars in (0, 100):
+            elapsed = bench_prepare(leaves, envvars)
+            print(f"  {envvars} environment variables set: {elapsed:.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark loading a worker config from config files and from a snapshot file.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_snapshot.py
+"""
+import os
+import tempfile
+import time
+
+from resconfig import ResConfig
+
+
+def make_config(leaves, width=10):
+    return {
+        f"section{i}": {
+            f"group{j}": {f"key{k}": k for k in range(width)} for j in range(width)
+        }
+        for i in range(leaves // width // width)
+    }
+
+
+def bench(leaves, suffix):
+    default = make_config(leaves)
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "conf" + suffix)
+        snapshot = os.path.join(d, "conf.snapshot")
+        ResConfig(default).save_to_file(filename)
+        publisher = ResConfig(default, config_files=[filename])
+        publisher.publish(snapshot)
+
+        worker = ResConfig(default, config_files=[filename], load_on_init=False)
+        start = time.perf_counter()
+        worker.load()
+        load = time.perf_counter() - start
+
+        worker = ResConfig(default, load_on_init=False)
+        start = time.perf_counter()
+        worker.attach(snapshot)
+        attach = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            worker.sync()
+        sync = (time.perf_counter() - start) / 1000
+    return load, attach, sync
+
+
+def main():
+    for leaves in (10000, 100000):
+        print(f"worker config of {leaves} leaves")
+        for suffix in (".json", ".yaml"):
+            load, attach, sync = bench(leaves, suffix)
+            print(
+                f"  {suffix[1:]}: load() {load:.3f} s, attach() {attach:.3f} s, "
+                f"unchanged sync() {sync * 1e6:.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
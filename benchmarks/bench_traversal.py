@@ -0,0 +1,71 @@
+"""Benchmark tree traversals on wide and deep synthetic configs.
+
+A wide tree has ten levels of fan-out at most, and a deep tree is a chain of nested
+nodes with ten leaves on each level. Run from the repository root::
+
+    $ python benchmarks/bench_traversal.py [max number of leaves]
+"""
+import sys
+import time
+from copy import deepcopy
+
+from resconfig import ResConfig
+from resconfig.ondict import ONDict
+from resconfig.ondict import merge
+from resconfig.ondict import normalize
+
+
+def wide(leaves, offset=0):
+    width = 10
+    depth = 1
+    while width**depth < leaves:
+        depth += 1
+    d = {}
+    for i in range(leaves):
+        key = ".".join(f"k{(i // width ** n) % width}" for n in range(depth))
+        d[key] = i + offset
+    return d
+
+
+def deep(leaves, offset=0):
+    d = {}
+    for i in range(leaves // 10):
+        d = {"next": d}
+        d.update((f"v{j}", i + j + offset) for j in range(10))
+    return d
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"    {label:<12} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def bench(shape, leaves):
+    print(f"  {shape} tree, {leaves} leaves")
+    src = globals()[shape](leaves)
+    d = timed("normalize", normalize, src, ONDict)
+    timed("ONDict", ONDict, src)
+    timed("allkeys", lambda: sum(1 for _ in d.allkeys()))
+    timed("asdict", d.asdict)
+    timed("deepcopy", deepcopy, d)
+    timed("merge", merge, deepcopy(d), normalize(globals()[shape](leaves, 1), ONDict))
+    if shape == "deep" and leaves > 10000:
+        return
+    rc = timed("ResConfig", ResConfig, src)
+    timed("replace", rc.replace, globals()[shape](leaves, 1))
+    timed("reload", rc.reload)
+
+
+def main(maxleaves=100000):
+    leaves = 10000
+    while leaves <= maxleaves:
+        for shape in ("wide", "deep"):
+            bench(shape, leaves)
+        leaves *= 10
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(1000)
+    main(*(int(arg) for arg in sys.argv[1:]))
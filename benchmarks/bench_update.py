@@ -0,0 +1,51 @@
+"""Benchmark ResConfig.replace on large configs with and without watchers.
+
+Run from the repository root::
+
+    $ python benchmarks/bench_update.py
+"""
+import time
+from copy import deepcopy
+
+from resconfig import ResConfig
+
+
+def make_config(leaves, width=10):
+    return {
+        f"section{i}": {
+            f"group{j}": {f"key{k}": k for k in range(width)} for j in range(width)
+        }
+        for i in range(leaves // width // width)
+    }
+
+
+def bench_replace(leaves, watched):
+    default = make_config(leaves)
+    config = ResConfig(default)
+    sections = list(default)
+    if watched == "one":
+        config.register(f"{sections[0]}.group0.key0", lambda *args: None)
+    elif watched == "sections":
+        for section in sections:
+            config.register(section, lambda *args: None)
+
+    # Modify one leaf in every section, so that every watched section changes.
+    newconf = deepcopy(default)
+    for section in sections:
+        newconf[section]["group0"]["key0"] = -1
+
+    start = time.perf_counter()
+    config.replace(newconf)
+    return time.perf_counter() - start
+
+
+def main():
+    for leaves in (10000, 100000):
+        print(f"replace() on {leaves} leaves")
+        for watched in ("none", "one", "sections"):
+            elapsed = bench_replace(leaves, watched)
+            print(f"  watchers on {watched}: {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import asyncio
+from functools import partial
+
+from .typing import Any
+from .typing import Callable
+from .typing import Hashable
+from .typing import Optional
+from .typing import Tuple
+
+
+class Coalescer:
+    """Coalescer of concurrent calls to coroutine functions.
+
+    At most one call per key is in flight at a time. A call made while another with the
+    same key is in flight waits for it to finish, and all the calls made in the meantime
+    share a single call made afterwards, so that every caller gets the result of a call
+    started after its own, e.g., of a file read after the caller asked for it:
+
+    .. code-block:: python
+
+        coalescer = Coalescer()
+        await asyncio.gather(*[coalescer("conf", read, path) for _ in range(10)])
+        # read(path) is called at most twice
+
+    A caller that is cancelled does not cancel the call shared with the others.
+    """
+
+    def __init__(self):
+        self._running = {}  # The task in flight for each key
+        self._queued = {}  # The task waiting for the one in flight for each key
+
+    async def __call__(self, key: Hashable, func: Callable, *args) -> Any:
+        """Call the coroutine function, or join the call to be made.
+
+        Args:
+            key: Key identifying the calls to be coalesced.
+            func: Coroutine function.
+            *args: Positional arguments to the function.
+
+        Returns:
+            The result of the call.
+        """
+        task = self._queued.get(key)
+        if task is None:
+            running = self._running.get(key)
+            task = asyncio.ensure_future(self.__run(key, running, func, args))
+            task.add_done_callback(partial(self.__done, key))
+            if running is None:
+                self._running[key] = task
+            else:
+                self._queued[key] = task
+        return await asyncio.shield(task)
+
+    async def __run(
+        self,
+        key: Hashable,
+        running: Optional[asyncio.Future],
+        func: Callable,
+        args: Tuple[Any, ...],
+    ) -> Any:
+        if running is not None:
+            await asyncio.wait([running])
+            self._running[key] = self._queued.pop(key)
+        return await func(*args)
+
+    def __done(self, key: Hashable, task: asyncio.Future):
+        for tasks in (self._running, self._queued):
+            if tasks.get(key) is task:
+                del tasks[key]
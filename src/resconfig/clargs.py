@@ -83,4 +83,5 @@ class CLArgs:
             if k in self._default and v is not None:
                 conf.merge(ONDict({k: v}))
 
-        self._clargs = conf
+        with self._lock.write():
+            self._clargs = conf
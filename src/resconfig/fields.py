@@ -5,6 +5,8 @@ from functools import wraps
 from dateutil.parser import parse as dtparse
 
 from .ondict import ONDict
+from .typing import Mapping
+from .typing import Optional
 
 
 def checktype(f):
@@ -56,6 +58,28 @@ class Bool(Field):
     ftype = bool
     default = False
 
+    _strings = {
+        "true": True,
+        "false": False,
+        "1": True,
+        "0": False,
+        "yes": True,
+        "no": False,
+        "on": True,
+        "off": False,
+    }
+
+    @classmethod
+    def from_obj(cls, value):
+        if isinstance(value, str):
+            # Parse the strings as written by to_str, and as commonly set in
+            # environment variables.
+            try:
+                return cls._strings[value.strip().lower()]
+            except KeyError:
+                raise ValueError(f"invalid value for bool: {value!r}") from None
+        return bool(value)
+
     @classmethod
     @checktype
     def to_str(cls, value):
@@ -108,13 +132,47 @@ class NullableStr(Nullable, Str): pass
 # fmt: on
 
 
-def extract_values(d: ONDict) -> ONDict:
-    """Make a ONDict with only default values and no other type info."""
-    valueonly = ONDict()
+class FieldTable(dict):
+    """Flat table of the fields in a schema.
+
+    The table maps the key tuples to the :class:`Field` objects in the schema, so that
+    the field for a key is found by a single lookup instead of a walk down the schema.
+    """
+
+    @classmethod
+    def compile(cls, schema: Optional[Mapping]) -> "FieldTable":
+        """Compile the table from the schema.
+
+        Args:
+            schema: Schema, i.e., config with :class:`Field` objects as leaves, or the
+                table compiled already, which is returned as it is.
+
+        Returns:
+            A :class:`FieldTable` object.
+        """
+        if isinstance(schema, cls):
+            return schema
+        table = cls()
+        stack = [((), schema or {})]
+        while stack:
+            prefix, node = stack.pop()
+            for k, v in node.items():
+                if isinstance(v, Mapping):
+                    stack.append((prefix + (k,), v))
+                elif isinstance(v, Field):
+                    table[prefix + (k,)] = v
+        return table
+
+
+def extract_values(d: ONDict, fields: Optional[FieldTable] = None) -> ONDict:
+    """Make a ONDict with only default values and no other type info.
+
+    Args:
+        d: Schema.
+        fields: The table compiled from the schema, if any.
+    """
+    valueonly = ONDict.from_mapping(d, trusted=True)
     valueonly._create = True
-    for key in d.allkeys():
-        v = d[key]
-        if isinstance(v, Field):
-            v = v.value
-        valueonly[key] = v
+    for key, field in FieldTable.compile(fields or d).items():
+        valueonly[key] = field.value
     return valueonly
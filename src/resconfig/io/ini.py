@@ -2,6 +2,7 @@ from collections.abc import MutableMapping
 from configparser import ConfigParser
 
 from .. import fields
+from ..fields import FieldTable
 from ..ondict import ONDict
 from ..typing import IO
 from ..typing import Any
@@ -13,12 +14,12 @@ from .utils import unescape_dots_in_keys
 def dump(content: ONDict, f: IO, schema: Optional[ONDict] = None):
     if _depth(content) > 2:
         raise ValueError("INI config does not allow nested options")
-    schema = schema or {}
+    table = FieldTable.compile(schema)
 
     con = ONDict()
     con._create = True
     for key in list(content.allkeys()):
-        con[key] = _dumpobj(content[key], schema.get(key))
+        con[key] = _dumpobj(content[key], table.get(key))
 
     con = con.asdict()
 
@@ -35,7 +36,7 @@ def _dumpobj(value, field) -> Any:
 
 
 def load(f: IO, schema: Optional[ONDict] = None) -> ONDict:
-    schema = schema or {}
+    table = FieldTable.compile(schema)
     parser = ConfigParser()
     parser.read_file(f)
     conf = ONDict()
@@ -46,7 +47,7 @@ def load(f: IO, schema: Optional[ONDict] = None) -> ONDict:
         for option in parser[section]:
             option_key = escape_dot(option)
             ref[option_key] = _loadobj(
-                schema.get((section_key, option_key)), parser[section][option]
+                table.get((section_key, option_key)), parser[section][option]
             )
     return conf
 
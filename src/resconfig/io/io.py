@@ -1,3 +1,5 @@
+import asyncio
+
 from ..ondict import ONDict
 from ..typing import FilePath
 from ..typing import List
@@ -7,6 +9,9 @@ from .paths import INIPath
 from .paths import JSONPath
 from .paths import TOMLPath
 from .paths import YAMLPath
+from .snapshot import read_snapshot
+from .snapshot import snapshot_version
+from .snapshot import write_snapshot
 from .utils import ensure_path
 
 
@@ -58,10 +63,10 @@ class IO:
             paths: A list of config file paths.
             merge: The flag for the merge mode; see the function description.
         """
-        self.update(read_from_files_as_dict(paths, merge, self._default))
+        self.update(read_from_files_as_dict(paths, merge, self._fields))
 
     def __update_from_file(self, filename: ConfigPath):
-        self.update(filename.load(self._default))
+        self.update(filename.load(self._fields))
 
     def update_from_file(self, filename: FilePath):
         """Update config from the file.
@@ -72,6 +77,26 @@ class IO:
             filename = ConfigPath.from_extension(filename)
         self.__update_from_file(filename)
 
+    async def aupdate_from_file(self, filename: FilePath):
+        """Update config from the file asynchronously.
+
+        The file is read and parsed in the default executor of the event loop, and the
+        config is then updated in the event loop thread. The updates from the same file
+        requested while another is in progress are coalesced into one made after it, so
+        that only one reads the file at a time.
+
+        The file type is inferred from the filename extension.
+        """
+        if not isinstance(filename, ConfigPath):
+            filename = ConfigPath.from_extension(filename)
+        await self._coalescer(
+            ("file", str(filename)), self.__aupdate_from_file, filename
+        )
+
+    async def __aupdate_from_file(self, filename: ConfigPath):
+        loop = asyncio.get_event_loop()
+        self.update(await loop.run_in_executor(None, filename.load, self._fields))
+
     def update_from_ini(self, filename: FilePath):
         """Update config from the INI file."""
         self.__update_from_file(INIPath(filename))
@@ -88,8 +113,111 @@ class IO:
         """Update config from the YAML file."""
         self.__update_from_file(YAMLPath(filename))
 
+    def publish(self, filename: FilePath):
+        """Publish the config to the snapshot file.
+
+        The snapshot file holds the resolved config in compact JSON, from which other
+        processes, e.g., the workers of a prefork server, read the config with
+        :meth:`attach` and :meth:`sync` without parsing its sources. Publish again after
+        every reload, so that the attached processes switch to the new config:
+
+        .. code-block:: python
+
+            # In the parent process:
+            config.load()
+            config.publish("/run/myapp/config.snapshot")
+
+            # In each worker process:
+            config = ResConfig(default, load_on_init=False)
+            config.attach("/run/myapp/config.snapshot")
+            ...
+            config.sync()  # E.g., at the start of each request
+
+        The snapshot file replaces the existing one at once. Besides the JSON values,
+        only :class:`~datetime.datetime` values can be published.
+
+        Args:
+            filename: Path to the snapshot file.
+
+        Raises:
+            TypeError: When the config holds a value that cannot be published.
+        """
+        self._ensure_loaded()
+        with self._lock.read():
+            conf = self._conf.asdict()
+        write_snapshot(filename, conf)
+
+    def attach(self, filename: FilePath):
+        """Attach to the snapshot file published by :meth:`publish`.
+
+        The config is replaced with the one in the snapshot file, and is replaced again
+        by :meth:`sync` once the file is published again.
+
+        Args:
+            filename: Path to the snapshot file.
+
+        Raises:
+            FileNotFoundError: When the snapshot file does not exist.
+            ValueError: When the file is not a snapshot file.
+        """
+        with self._attach_lock:
+            previous = self._attached, self._load_pending
+            self._attached = (filename, None, None)
+            self._load_pending = False
+            try:
+                self.__sync()
+            except BaseException:
+                self._attached, self._load_pending = previous
+                raise
+            attached = previous[0]
+            if attached is not None and attached[2] is not None:
+                attached[2].close()
+
+    def sync(self) -> bool:
+        """Replace the config with the snapshot file if it has been published again.
+
+        The watch functions are triggered for the changes, as with :meth:`replace`.
+        Checking the snapshot file takes a single :func:`os.stat` call, so that this
+        method can be called often, e.g., on every request.
+
+        Returns:
+            :obj:`True` if the config has been read from the snapshot file.
+
+        Raises:
+            RuntimeError: When not attached to a snapshot file.
+        """
+        attached = self._attached
+        if attached is None:
+            raise RuntimeError("not attached to a config snapshot file")
+        filename, version, _ = attached
+        if snapshot_version(filename) == version:
+            return False
+        with self._attach_lock:
+            return self.__sync()
+
+    def __sync(self) -> bool:
+        # Read the snapshot file if it has been published again, holding the lock, so
+        # that the file read last is kept open and the config is replaced in order.
+        filename, version, f = self._attached
+        if snapshot_version(filename) == version:
+            return False
+        new = open(filename, "rb")
+        try:
+            conf = read_snapshot(new)
+        except BaseException:
+            new.close()
+            raise
+        # The file read is kept open, so that its inode is not reused by a later file.
+        self._attached = (filename, snapshot_version(new.fileno()), new)
+        if f is not None:
+            f.close()
+        self.replace(conf)
+        return True
+
     def __save(self, filename: ConfigPath):
-        filename.dump(self._conf, schema=self._default)
+        self._ensure_loaded()
+        with self._lock.read():
+            filename.dump(self._conf, schema=self._fields)
 
     @experimental
     def save_to_file(self, filename: FilePath):
@@ -5,6 +5,7 @@ from json.decoder import JSONDecodeError
 from logging import getLogger
 
 from .. import fields
+from ..fields import FieldTable
 from ..ondict import ONDict
 from ..typing import IO
 from ..typing import Any
@@ -16,11 +17,11 @@ log = getLogger(__name__)
 
 
 def dump(content: ONDict, f: IO, schema: Optional[ONDict] = None):
-    schema = schema or {}
+    table = FieldTable.compile(schema)
     con = ONDict()
     con._create = True
     for key in list(content.allkeys()):
-        con[key] = _dumpobj(content[key], schema.get(key))
+        con[key] = _dumpobj(content[key], table.get(key))
     _dump(con.asdict(), f)
 
 
@@ -42,18 +43,20 @@ def load(f: IO, schema: Optional[ONDict] = None) -> ONDict:
         log.exception("Load error")
         content = {}
 
-    def _walk(d, schema):
+    table = FieldTable.compile(schema)
+
+    def _walk(d, prefix):
         if not isinstance(d, MutableMapping):
-            return _loadobj(schema, d)
+            return _loadobj(table.get(prefix), d)
         for key in list(d.keys()):
             ekey = escape_dot(key)
-            d[key] = _walk(d[key], schema.get(ekey, {}))
+            d[key] = _walk(d[key], prefix + (ekey,))
             if ekey != key:
                 d[ekey] = d[key]
                 del d[key]
         return d
 
-    _walk(content, schema or {})
+    _walk(content, ())
 
     return ONDict(content)
 
@@ -0,0 +1,117 @@
+"""Config snapshot files shared between processes.
+
+A snapshot file holds a resolved config, so that it can be read without parsing and
+merging the config sources again. It consists of a header, i.e., the magic bytes and the
+size of the payload, followed by the payload, i.e., the config encoded in compact JSON.
+The :class:`~datetime.datetime` values are encoded as objects tagged with a reserved
+key, and the values of other types not supported by JSON are rejected. As the payload is
+data only, reading a snapshot file cannot execute code. Snapshot files are created
+readable and writable only by their owner.
+"""
+import json
+import os
+import struct
+import tempfile
+from datetime import datetime
+
+from dateutil.parser import isoparse
+
+from ..typing import IO
+from ..typing import Any
+from ..typing import FilePath
+from ..typing import Union
+
+MAGIC = b"RESCONF\x02"
+
+_header = struct.Struct("<8sQ")
+
+_DATETIME = "\0datetime"  # The key tagging an encoded datetime
+
+
+def write_snapshot(filename: FilePath, conf: dict):
+    """Write the config to the snapshot file.
+
+    The file is written to a temporary file in the same directory and then renamed, so
+    that readers see either the old or the new file in whole.
+
+    Args:
+        filename: Path to the snapshot file.
+        conf: Config of built-in :class:`dict` objects.
+
+    Raises:
+        TypeError: When the config holds a value that cannot be encoded.
+    """
+    payload = json.dumps(
+        conf, ensure_ascii=False, separators=(",", ":"), default=_encode
+    ).encode()
+    filename = os.fspath(filename)
+    fd, tmp = tempfile.mkstemp(
+        prefix=os.path.basename(filename) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(filename)),
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_header.pack(MAGIC, len(payload)))
+            f.write(payload)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def read_snapshot(f: IO[bytes]) -> dict:
+    """Read the config from the snapshot file.
+
+    Args:
+        f: Snapshot file opened for reading in binary mode.
+
+    Returns:
+        Config of built-in :class:`dict` objects.
+
+    Raises:
+        ValueError: When the file is not a snapshot file.
+    """
+    f.seek(0)
+    data = f.read()
+    if len(data) < _header.size:
+        raise ValueError(f"not a config snapshot file: {f.name}")
+    magic, size = _header.unpack_from(data)
+    if magic != MAGIC or _header.size + size != len(data):
+        raise ValueError(f"not a config snapshot file: {f.name}")
+    try:
+        conf = json.loads(data[_header.size :].decode(), object_hook=_decode)
+    except ValueError as exc:
+        raise ValueError(f"broken config snapshot file: {f.name}") from exc
+    if not isinstance(conf, dict):
+        raise ValueError(f"broken config snapshot file: {f.name}")
+    return conf
+
+
+def _encode(value: Any) -> dict:
+    if isinstance(value, datetime):
+        return {_DATETIME: value.isoformat()}
+    raise TypeError(f"cannot write {type(value).__name__} to a config snapshot file")
+
+
+def _decode(obj: dict) -> Any:
+    if len(obj) == 1 and _DATETIME in obj:
+        return isoparse(obj[_DATETIME])
+    return obj
+
+
+def snapshot_version(file: Union[FilePath, int]) -> tuple:
+    """Return the version of the snapshot file.
+
+    The version changes whenever the file is published, and is obtained with a single
+    :func:`os.stat` call without reading the file. Note that the inode of a replaced
+    file may be reused by a later one unless the replaced file is kept open.
+
+    Args:
+        file: Path to, or file descriptor of, the snapshot file.
+
+    Returns:
+        Opaque tuple to be compared for equality.
+    """
+    st = os.stat(file)
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
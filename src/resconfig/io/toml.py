@@ -1,6 +1,7 @@
 from collections.abc import MutableMapping
 
 from .. import fields
+from ..fields import FieldTable
 from ..ondict import ONDict
 from ..typing import IO
 from ..typing import Any
@@ -16,11 +17,11 @@ except ImportError:
 
 
 def dump(content: ONDict, f: IO, schema: Optional[ONDict] = None):
-    schema = schema or {}
+    table = FieldTable.compile(schema)
     con = ONDict()
     con._create = True
     for key in list(content.allkeys()):
-        con[key] = _dumpobj(content[key], schema.get(key))
+        con[key] = _dumpobj(content[key], table.get(key))
     f.write(_dump(con.asdict()))
 
 
@@ -36,18 +37,20 @@ def _dumpobj(value, field) -> Any:
 def load(f: IO, schema: Optional[ONDict] = None) -> ONDict:
     content = _load(f.read())
 
-    def _walk(d, schema):
+    table = FieldTable.compile(schema)
+
+    def _walk(d, prefix):
         if not isinstance(d, MutableMapping):
-            return _loadobj(schema, d)
+            return _loadobj(table.get(prefix), d)
         for key in list(d.keys()):
             ekey = escape_dot(key)
-            d[key] = _walk(d[key], schema.get(ekey, {}))
+            d[key] = _walk(d[key], prefix + (ekey,))
             if ekey != key:
                 d[ekey] = d[key]
                 del d[key]
         return d
 
-    _walk(content, schema or {})
+    _walk(content, ())
 
     return ONDict(content)
 
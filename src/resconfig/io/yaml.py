@@ -1,4 +1,5 @@
 from .. import fields
+from ..fields import FieldTable
 from ..ondict import ONDict
 from ..typing import IO
 from ..typing import Any
@@ -11,11 +12,11 @@ except ImportError:
 
 
 def dump(content: ONDict, f: IO, schema: Optional[ONDict] = None):
-    schema = schema or {}
+    table = FieldTable.compile(schema)
     con = ONDict()
     con._create = True
     for key in list(content.allkeys()):
-        con[key] = _dumpobj(content[key], schema.get(key))
+        con[key] = _dumpobj(content[key], table.get(key))
     yaml.dump(con.asdict(), f)
 
 
@@ -0,0 +1,114 @@
+import threading
+
+
+class _Reading:
+    __slots__ = ("_lock",)
+
+    def __init__(self, lock: "RWLock"):
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire_read()
+
+    def __exit__(self, *exc):
+        self._lock.release_read()
+
+
+class _Writing:
+    __slots__ = ("_lock",)
+
+    def __init__(self, lock: "RWLock"):
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire_write()
+
+    def __exit__(self, *exc):
+        self._lock.release_write()
+
+
+class RWLock:
+    """Reader-writer lock.
+
+    Any number of threads can hold the lock for reading at once, whereas a thread
+    holding it for writing holds it exclusively. Writers are preferred; once a writer is
+    waiting, new readers wait until it is done, so that a steady stream of readers does
+    not starve writers. The lock is not reentrant.
+
+    .. code-block:: python
+
+        lock = RWLock()
+        with lock.read():
+            ...  # Shared
+        with lock.write():
+            ...  # Exclusive
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0  # Number of threads reading
+        self._writing = False  # True while a thread is writing
+        self._waiting = 0  # Number of threads waiting to write
+        self._reading_ctx = _Reading(self)
+        self._writing_ctx = _Writing(self)
+
+    def acquire_read(self):
+        """Acquire the lock for reading."""
+        with self._cond:
+            while self._writing or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """Release the lock held for reading."""
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """Acquire the lock for writing."""
+        with self._cond:
+            self._waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writing = True
+
+    def release_write(self):
+        """Release the lock held for writing."""
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+    def read(self) -> _Reading:
+        """Get the context manager holding the lock for reading."""
+        return self._reading_ctx
+
+    def write(self) -> _Writing:
+        """Get the context manager holding the lock for writing."""
+        return self._writing_ctx
+
+
+class _Unlocked:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+class NullLock:
+    """Lock of the :class:`RWLock` interface that does not lock at all."""
+
+    _unlocked = _Unlocked()
+
+    def read(self) -> _Unlocked:
+        """Get the context manager doing nothing."""
+        return self._unlocked
+
+    def write(self) -> _Unlocked:
+        """Get the context manager doing nothing."""
+        return self._unlocked
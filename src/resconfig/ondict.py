@@ -1,28 +1,72 @@
 import re
 from collections import OrderedDict
 from collections.abc import MutableMapping
+from copy import deepcopy
+from functools import lru_cache
 from functools import wraps
+from hashlib import blake2b
 
+from .actions import Action
 from .typing import RT
 from .typing import Any
 from .typing import Callable
 from .typing import Generator
 from .typing import Iterable
 from .typing import Key
+from .typing import List
 from .typing import Mapping
+from .typing import NamedTuple
 from .typing import Optional
 from .typing import Tuple
 from .typing import Type
 
 _default = object()
 
+_KEY_CACHE_SIZE = 4096
+"""Maximum number of parsed keys to retain in the key cache."""
+
+_key_delimiter = re.compile(r"(?<!\\)\.")
+
+
+class BaseONDict(dict):
+    """Base class of the :class:`dict` objects with nested key notation.
+
+    The mapping storing the items is the next class in the method resolution order of
+    a concrete subclass, e.g., :class:`~collections.OrderedDict` for :class:`ONDict`.
+    """
+
+    __slots__ = ()
 
-class ONDict(OrderedDict):
     _create = None
 
     def __init__(self, *args, **kwargs):
         super().__init__()
-        self.merge(*args, **kwargs)
+        if args:
+            if len(args) != 1:
+                raise TypeError(f"update expected at most 1 argument, got {len(args)}")
+            arg = args[0]
+            self._build(arg.items() if hasattr(arg, "keys") else _pairs(arg))
+        if kwargs:
+            self._build(kwargs.items())
+
+    def __deepcopy__(self, memo):
+        new = self.__class__()
+        memo[id(self)] = new
+        stack = [(self, new)]
+        while stack:
+            src, dst = stack.pop()
+            if getattr(src, "__dict__", None):
+                dst.__dict__.update(deepcopy(src.__dict__, memo))
+            for k, v in src.items():
+                if isinstance(v, BaseONDict) and id(v) not in memo:
+                    child = v.__class__()
+                    memo[id(v)] = child
+                    stack.append((v, child))
+                    v = child
+                else:
+                    v = deepcopy(v, memo)
+                dst._store(k, v)
+        return new
 
     def __repr__(self):
         items = []
@@ -35,7 +79,9 @@ class ONDict(OrderedDict):
             ref, lastkey = _get(self, key, self._create)
         except Exception:
             return False
-        return (super() if ref is self else ref).__contains__(lastkey)
+        if isinstance(ref, dict):
+            return dict.__contains__(ref, lastkey)
+        return lastkey in ref
 
     def __delitem__(self, key):
         ref, lastkey = _get(self, key, self._create)
@@ -47,10 +93,10 @@ class ONDict(OrderedDict):
         ref, lastkey = _get(self, key, self._create)
         if ref is self:
             return super().__getitem__(lastkey)
-        else:
-            if lastkey not in ref:
-                raise _key_error(ref, key)
-            return ref.__getitem__(lastkey)
+        try:
+            return _getraw(ref, lastkey)
+        except KeyError:
+            raise _key_error(ref, key)
 
     def __setitem__(self, key, value):
         ref, lastkey = _get(self, key, self._create)
@@ -61,7 +107,9 @@ class ONDict(OrderedDict):
             ref, lastkey = _get(self, key, self._create)
         except Exception:
             return default
-        return (super() if ref is self else ref).get(lastkey, default)
+        if isinstance(ref, dict):
+            return dict.get(ref, lastkey, default)
+        return ref.get(lastkey, default)
 
     def pop(self, key, d=_default):
         if d is _default:
@@ -115,34 +163,58 @@ class ONDict(OrderedDict):
 
     @classmethod
     def fromkeys(cls, iterable, value=None):
-        dic = cls()
-        for key in iterable:
-            dic = merge(dic, normalize({key: value}, cls=cls))
-        return dic
+        return cls.from_items((key, value) for key in iterable)
 
-    # custom utility methods
+    @classmethod
+    def from_mapping(cls, d: Mapping[Key, Any], trusted: bool = False) -> "BaseONDict":
+        """Build an object from a (nested) mapping in a single pass.
+
+        The result is the same as ``cls(d)``, but nested keys are expanded and nested
+        mappings are converted while the input is walked only once.
+
+        Args:
+            d: Mapping to build the object from.
+            trusted: If :obj:`True`, the keys in ``d`` are trusted to be plain,
+                non-nested keys and used as they are, skipping the parsing of the
+                “.”-style notation.
 
-    def __allkeys(self, key, d):
-        _key = key[-1]
-        if not isdict(d[_key]):
-            yield key[1:]
-            return
-        for k in d[_key]:
-            for i in self.__allkeys(key + (k,), d[_key]):
-                yield i
+        Raises:
+            TypeError: When an attempt is made to convert a non-:class:`dict` node set
+                by an earlier item of the same mapping to a :class:`dict` node, as
+                with :func:`normalize`.
+        """
+        new = cls()
+        new._build(d.items(), trusted)
+        return new
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Tuple[Key, Any]], trusted: bool = False
+    ) -> "BaseONDict":
+        """Build an object from an iterable of key-value pairs in a single pass.
+
+        The pairs are merged in order, so that the result is the same as merging
+        ``{key: value}`` for each pair, but the cost is linear in the number of keys.
+
+        Args:
+            items: Iterable of key-value pairs, where the keys may be nested.
+            trusted: If :obj:`True`, the keys are trusted to be plain, non-nested keys
+                and used as they are.
+
+        Raises:
+            TypeError: When an attempt is made to convert a non-:class:`dict` node set
+                by an earlier item of the same mapping to a :class:`dict` node, as
+                with :func:`normalize`.
+        """
+        new = cls()
+        new._build(items, trusted)
+        return new
+
+    # custom utility methods
 
     def allkeys(self, as_str=False):
         """Generate all keys to the leaves"""
-        for key in self.__allkeys(("__ROOT__",), {"__ROOT__": self}):
-            yield ".".join(key) if as_str else key
-
-    def __asdict(self, d):
-        if not isinstance(d, MutableMapping):
-            return d
-        result = {}
-        for k in d.keys():
-            result[k] = self.__asdict(d[k])
-        return result
+        return _allkeys(self, as_str)
 
     def asdict(self) -> dict:
         """Get a built-in dict representation of itself.
@@ -152,7 +224,7 @@ class ONDict(OrderedDict):
         Returns:
             Built-in :class:`dict` object.
         """
-        return self.__asdict(self)
+        return _asdict(self)
 
     def merge(self, *args, **kwargs):
         """Merge from dict and/or iterable.
@@ -184,6 +256,599 @@ class ONDict(OrderedDict):
         for k in kwargs:
             merge(self, normalize({k: kwargs[k]}, cls=self.__class__))
 
+    def _build(self, items: Iterable[Tuple[Key, Any]], trusted: bool = False):
+        # Merge the items into the object, walking the items and their nested mappings
+        # once, with the same result as merging normalize({key: value}) for each item.
+        # As in normalize(), a nested key is not expanded through a leaf set by an
+        # earlier item of the same mapping, and a leaf given at a mapping set by one is
+        # merged into it; otherwise, the items are overwritten as in merge(). The
+        # mappings of the input are numbered as they are entered, and each key path is
+        # marked with the number last current when it was set, so that what was set
+        # within a mapping still being walked is told by the number. Trusted keys are
+        # never expanded, and no path is marked for them.
+        marks = {}
+        serial = 0
+        stack = [(iter(items), self, (), 0)]
+        while stack:
+            items, node, path, start = stack[-1]
+            for key, value in items:
+                parent = node
+                if trusted:
+                    k = key
+                    keypath = None
+                else:
+                    if len(stack) == 1:
+                        serial += 1  # Each top-level item is normalized separately
+                        start = serial
+                    keys = _keytuple(key)
+                    keypath = path
+                    for k in keys[:-1]:
+                        keypath += (k,)
+                        child = dict.get(parent, k, _default)
+                        if not isinstance(child, BaseONDict):
+                            if marks.get(keypath, 0) >= start:
+                                raise TypeError(
+                                    f"cannot convert a node from non-dict to dict at "
+                                    f"'{'.'.join(keypath)}'"
+                                )
+                            child = parent._newnode(k)
+                            parent._store(k, child)
+                        marks[keypath] = serial
+                        parent = child
+                    k = keys[-1]
+                    keypath += (k,)
+                old = dict.get(parent, k, _default)
+                if isinstance(value, MutableMapping):
+                    if not isinstance(old, BaseONDict):
+                        old = parent._newnode(k)
+                        parent._store(k, old)
+                    if keypath is not None:
+                        marks[keypath] = serial
+                        serial += 1
+                    stack.append((iter(value.items()), old, keypath, serial))
+                    break
+                if isinstance(old, BaseONDict):
+                    if keypath is not None and marks.get(keypath, 0) >= start:
+                        merge(old, value)  # As normalize() does
+                        continue
+                    parent._unlink(k)
+                parent._store(k, value)
+                if keypath is not None:
+                    marks[keypath] = serial
+            else:
+                stack.pop()
+
+    def _newnode(self, key: str) -> "BaseONDict":
+        return self.__class__()
+
+    def _store(self, key: str, value: Any):
+        super().__setitem__(key, value)
+
+    def _unlink(self, key: str):
+        pass
+
+
+class ONDict(BaseONDict, OrderedDict):
+    """:class:`~collections.OrderedDict` with nested key notation."""
+
+
+class DictONDict(BaseONDict):
+    """Built-in :class:`dict` with nested key notation.
+
+    The object has the same interface as :class:`ONDict`, but its nested nodes take
+    less memory, as they do not maintain the linked list of
+    :class:`~collections.OrderedDict`. The items are kept in insertion order as in
+    :class:`dict` (guaranteed on Python 3.7+ and CPython 3.6), but the order is not
+    significant in comparison.
+    """
+
+    __slots__ = ()
+
+
+class IndexedONDict(ONDict):
+    """:class:`ONDict` with a flat index of its nested items.
+
+    In addition to the nested storage, a flat ``{key tuple: value}`` index of all the
+    leaves and subtrees is shared by the nested nodes, so that reading a nested key is
+    a single hash lookup regardless of its depth. The index is kept consistent by all
+    the methods that mutate the object or any of its nested nodes.
+
+    The keys generated by :meth:`allkeys` are also cached until the object or any of
+    its nested nodes is mutated, so that repeatedly listing the keys of an unchanged
+    object does not traverse it.
+
+    A subtree can only be stored at one place. If a mapping that is not a standalone
+    :class:`IndexedONDict` object is stored, its copy is stored instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._index = {}
+        self._prefix = ()
+        self._keycache = {}
+        super().__init__(*args, **kwargs)
+
+    def __reduce__(self):
+        return self.__class__, (), None, None, iter(self.items())
+
+    def __deepcopy__(self, memo):
+        new = self.__class__()
+        memo[id(self)] = new
+        stack = [(self, new)]
+        while stack:
+            src, dst = stack.pop()
+            for k, v in src.items():
+                if isdict(v):
+                    child = dst._newnode(k)
+                    dst._store(k, child)
+                    stack.append((v, child))
+                else:
+                    dst._store(k, deepcopy(v, memo))
+        return new
+
+    def __contains__(self, key):
+        try:
+            return self._prefix + _keytuple(key) in self._index
+        except TypeError:
+            return False
+
+    def __delitem__(self, key):
+        ref, lastkey = _get(self, key, self._create)
+        if not dict.__contains__(ref, lastkey):
+            raise _key_error(ref, key)
+        ref._remove(lastkey)
+
+    def __getitem__(self, key):
+        try:
+            return self._index[self._prefix + _keytuple(key)]
+        except (KeyError, TypeError):
+            # Let the nested lookup raise the error describing the failure.
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        ref, lastkey = _get(self, key, self._create)
+        ref._set(lastkey, value)
+
+    def clear(self):
+        for k in list(self.keys()):
+            self._remove(k)
+
+    def get(self, key, default=None):
+        try:
+            return self._index.get(self._prefix + _keytuple(key), default)
+        except TypeError:
+            return default
+
+    def pop(self, key, d=_default):
+        try:
+            ref, lastkey = _get(self, key, self._create)
+        except Exception:
+            if d is _default:
+                raise
+            return d
+        if not dict.__contains__(ref, lastkey):
+            if d is _default:
+                raise _key_error(ref, key)
+            return d
+        return ref._remove(lastkey)
+
+    def popitem(self, last=True):
+        if not self:
+            raise KeyError("dictionary is empty")
+        k = next(reversed(self.keys()) if last else iter(self.keys()))
+        return k, self._remove(k)
+
+    def move_to_end(self, key, last=True):
+        super().move_to_end(key, last)
+        self._keycache.clear()
+
+    def setdefault(self, key, default=None):
+        ref, lastkey = _get(self, key, self._create)
+        if not dict.__contains__(ref, lastkey):
+            ref._set(lastkey, default)
+        return dict.__getitem__(ref, lastkey)
+
+    def allkeys(self, as_str=False):
+        try:
+            keys = self._keycache[self._prefix, as_str]
+        except KeyError:
+            keys = self._keycache[self._prefix, as_str] = tuple(_allkeys(self, as_str))
+        return iter(keys)
+
+    def _newnode(self, key: str) -> "IndexedONDict":
+        node = self.__class__()
+        node._index = self._index
+        node._prefix = self._prefix + (key,)
+        node._keycache = self._keycache
+        return node
+
+    def _store(self, key: str, value: Any):
+        OrderedDict.__setitem__(self, key, value)
+        self._index[self._prefix + (key,)] = value
+        self._keycache.clear()
+
+    def _set(self, key: str, value: Any):
+        if dict.__contains__(self, key):
+            if dict.__getitem__(self, key) is value:
+                return
+            self._unlink(key)
+        if isdict(value):
+            value = self._attach(key, value)
+        self._store(key, value)
+
+    def _unlink(self, key: str):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, IndexedONDict):
+            _reindex(value, {}, (), {})
+
+    def _remove(self, key: str) -> Any:
+        value = OrderedDict.pop(self, key)
+        del self._index[self._prefix + (key,)]
+        self._keycache.clear()
+        if isinstance(value, IndexedONDict):
+            _reindex(value, {}, (), {})
+        return value
+
+    def _attach(self, key: str, value: Mapping) -> "IndexedONDict":
+        if (
+            isinstance(value, IndexedONDict)
+            and not value._prefix
+            and value._index is not self._index
+        ):
+            _reindex(value, self._index, self._prefix + (key,), self._keycache)
+            return value
+        node = self._newnode(key)
+        stack = [(value, node)]
+        while stack:
+            src, dst = stack.pop()
+            for k, v in src.items():
+                if isdict(v):
+                    child = dst._newnode(k)
+                    dst._store(k, child)
+                    stack.append((v, child))
+                else:
+                    dst._store(k, v)
+        return node
+
+
+def _reindex(node: IndexedONDict, index: dict, prefix: Tuple[str, ...], keycache: dict):
+    # Move the subtree at node from its current index to index at prefix.
+    node._keycache.clear()
+    stack = [(node, prefix)]
+    while stack:
+        node, prefix = stack.pop()
+        oldindex, oldprefix = node._index, node._prefix
+        node._index, node._prefix, node._keycache = index, prefix, keycache
+        for k, v in node.items():
+            oldindex.pop(oldprefix + (k,), None)
+            index[prefix + (k,)] = v
+            if isinstance(v, IndexedONDict):
+                stack.append((v, prefix + (k,)))
+
+
+class FrozenONDict(Mapping):
+    """Immutable, persistent counterpart of :class:`ONDict`.
+
+    The object supports the same nested key notation for reading as :class:`ONDict`,
+    and all of its nested mappings are :class:`FrozenONDict` objects. It cannot be
+    mutated; instead, :meth:`set`, :meth:`delete`, and :meth:`refresh` return a new
+    object that shares all the unchanged nested mappings with the original, so that
+    deriving one costs in proportion to the change, not the size of the whole tree.
+
+    Note that leaf values are shared, not copied, and should be treated as read-only.
+    """
+
+    __slots__ = ("_data", "_digest")
+
+    def __init__(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs and isinstance(args[0], BaseONDict):
+            src = args[0]
+        else:
+            src = ONDict(*args, **kwargs)
+        self._data = freeze(src)._data
+        self._digest = None
+
+    @classmethod
+    def _wrap(cls, data: dict) -> "FrozenONDict":
+        obj = cls.__new__(cls)
+        obj._data = data
+        obj._digest = None
+        return obj
+
+    def __repr__(self):
+        items = []
+        for k, v in self.items():
+            items.append(f"{k!r}: {v!r}")
+        return "FrozenONDict({" + ", ".join(items) + "})"
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except Exception:
+            return False
+        return True
+
+    def __copy__(self):
+        return self
+
+    def __getitem__(self, key):
+        keys = _keytuple(key)
+        ref = self
+        for idx, k in enumerate(keys):
+            if not isinstance(ref, FrozenONDict):
+                raise _type_error(ref, ".".join(keys[:idx]))
+            try:
+                ref = ref._data[k]
+            except KeyError:
+                raise _key_error(ref, key)
+        return ref
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except Exception:
+            return default
+
+    def allkeys(self, as_str=False):
+        """Generate all keys to the leaves"""
+        return _allkeys(self, as_str)
+
+    def asdict(self) -> dict:
+        """Get a built-in dict representation of itself.
+
+        Returns:
+            Built-in :class:`dict` object.
+        """
+        return _asdict(self)
+
+    def fingerprint(self) -> str:
+        """Get the content hash of itself.
+
+        The hash is computed Merkle-style from those of the nested mappings, each of
+        which is computed once and cached in the mapping. Since the objects derived by
+        :meth:`set`, :meth:`delete`, and :meth:`refresh` share the unchanged nested
+        mappings, only the mappings on the way to the changes are hashed again.
+
+        The hash does not depend on the order of keys, and is stable across processes
+        as long as the leaf values have deterministic :func:`repr`.
+
+        Returns:
+            Hex digest string.
+        """
+        if self._digest is None:
+            stack = [self]
+            while stack:
+                node = stack[-1]
+                pending = [
+                    v
+                    for v in node._data.values()
+                    if isinstance(v, FrozenONDict) and v._digest is None
+                ]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                if node._digest is None:
+                    node._digest = _digest(node)
+        return self._digest.hex()
+
+    def thaw(self, cls: Type[BaseONDict] = ONDict) -> BaseONDict:
+        """Get a mutable copy of itself.
+
+        Args:
+            cls: The :class:`ONDict` class for the copy.
+
+        Returns:
+            An object of ``cls``, sharing the leaf values with this object.
+        """
+        new = cls()
+        stack = [(self, new)]
+        while stack:
+            src, dst = stack.pop()
+            for k, v in src._data.items():
+                if isinstance(v, FrozenONDict):
+                    dst[(k,)] = cls()
+                    stack.append((v, dst[(k,)]))
+                else:
+                    dst[(k,)] = v
+        return new
+
+    def set(self, key: Key, value: Any) -> "FrozenONDict":
+        """Return a new object with the value set at the key.
+
+        The missing nested mappings on the way to the key are created, replacing
+        non-mapping values if necessary.
+
+        Args:
+            key: Key.
+            value: Value to set. A mapping is frozen into :class:`FrozenONDict`.
+
+        Returns:
+            A new :class:`FrozenONDict` object.
+        """
+        keys = _keytuple(key)
+        nodes = [self]
+        for k in keys[:-1]:
+            ref = nodes[-1]
+            nodes.append(ref._data.get(k) if isinstance(ref, FrozenONDict) else None)
+        new = freeze(value)
+        for k, node in zip(reversed(keys), reversed(nodes)):
+            data = dict(node._data) if isinstance(node, FrozenONDict) else {}
+            data[k] = new
+            new = self._wrap(data)
+        return new
+
+    def delete(self, key: Key) -> "FrozenONDict":
+        """Return a new object without the key.
+
+        Args:
+            key: Key.
+
+        Returns:
+            A new :class:`FrozenONDict` object.
+
+        Raises:
+            KeyError: When the key does not exist.
+        """
+        if key not in self:
+            raise _key_error(self, key)
+        keys = _keytuple(key)
+        nodes = [self]
+        for k in keys[:-1]:
+            nodes.append(nodes[-1]._data[k])
+        data = dict(nodes.pop()._data)
+        del data[keys[-1]]
+        new = self._wrap(data)
+        for k, node in zip(reversed(keys[:-1]), reversed(nodes)):
+            data = dict(node._data)
+            data[k] = new
+            new = self._wrap(data)
+        return new
+
+    def refresh(self, conf: Mapping, keys: Iterable[Tuple[str, ...]]) -> "FrozenONDict":
+        """Return a new object reflecting the changes made at keys in the config.
+
+        This object is assumed to be a snapshot of ``conf`` before the items at
+        ``keys`` were changed, i.e., set, added, or removed. Only the nested mappings on
+        the way to the changed keys are rebuilt, and all the others are shared with this
+        object.
+
+        Args:
+            conf: The mapping this object is a snapshot of.
+            keys: Tuples of keys at which ``conf`` has changed.
+
+        Returns:
+            A new :class:`FrozenONDict` object.
+        """
+        # Build a trie of the changed keys, where None marks the changed key.
+        trie = {}
+        for key in keys:
+            node = trie
+            for k in key[:-1]:
+                node = node.setdefault(k, {})
+                if node is None:
+                    break
+            else:
+                node[key[-1]] = None
+        if not trie:
+            return self
+
+        # Each frame holds the snapshot and the config at the node, the trie at the
+        # node, the data being built and the items of the config left to visit, and
+        # where the data is stored when done.
+        stack = [(self, conf, trie, {}, iter(conf.items()), None, None)]
+        while True:
+            old, cur, trie, data, items, parent, pkey = stack[-1]
+            for k, v in items:
+                oldv = old._data.get(k, _default)
+                if k not in trie:
+                    data[k] = freeze(v) if oldv is _default else oldv
+                    continue
+                subtrie = trie[k]
+                if (
+                    subtrie is None
+                    or not isdict(v)
+                    or not isinstance(oldv, FrozenONDict)
+                ):
+                    data[k] = freeze(v)
+                else:
+                    stack.append((oldv, v, subtrie, {}, iter(v.items()), data, k))
+                    break
+            else:
+                stack.pop()
+                new = self._wrap(data)
+                if parent is None:
+                    return new
+                parent[pkey] = new
+
+
+def _digest(node: FrozenONDict) -> bytes:
+    # Hash the node from the digests of its children, which must be computed already.
+    items = []
+    for k, v in node._data.items():
+        if isinstance(v, FrozenONDict):
+            digest = b"n" + v._digest
+        else:
+            leaf = f"{type(v).__module__}.{type(v).__qualname__}:{v!r}"
+            digest = b"l" + blake2b(leaf.encode(), digest_size=16).digest()
+        items.append((repr(k).encode(), digest))
+    h = blake2b(digest_size=16)
+    for k, digest in sorted(items):
+        h.update(k + b"\0" + digest)
+    return h.digest()
+
+
+def _samedigest(a: Any, b: Any) -> bool:
+    # Test if both are FrozenONDict objects with the same, already computed, digest.
+    return (
+        isinstance(a, FrozenONDict)
+        and isinstance(b, FrozenONDict)
+        and a._digest is not None
+        and a._digest == b._digest
+    )
+
+
+def freeze(value: Any) -> Any:
+    """Freeze the value into :class:`FrozenONDict` if it is a mapping.
+
+    Args:
+        value: Value to freeze.
+
+    Returns:
+        A :class:`FrozenONDict` object if the value is a mapping, or the value itself.
+    """
+    if not isdict(value) or isinstance(value, FrozenONDict):
+        return value
+    root = {}
+    stack = [(value, root)]
+    while stack:
+        src, data = stack.pop()
+        for k, v in src.items():
+            if isdict(v) and not isinstance(v, FrozenONDict):
+                child = {}
+                data[k] = FrozenONDict._wrap(child)
+                stack.append((v, child))
+            else:
+                data[k] = v
+    return FrozenONDict._wrap(root)
+
+
+def _allkeys(d: Mapping, as_str: bool = False) -> Generator[Key, None, None]:
+    stack = [((), iter(d.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for k, v in items:
+            key = prefix + (k,)
+            if _isnode(v):
+                stack.append((key, iter(v.items())))
+                break
+            yield ".".join(key) if as_str else key
+        else:
+            stack.pop()
+
+
+def _asdict(d: Mapping) -> dict:
+    result = {}
+    stack = [(d, result)]
+    while stack:
+        d, new = stack.pop()
+        for k, v in d.items():
+            if _isnode(v):
+                new[k] = {}
+                stack.append((v, new[k]))
+            else:
+                new[k] = v
+    return result
+
+
+def _isnode(value: Any) -> bool:
+    return isdict(value) or isinstance(value, FrozenONDict)
+
 
 def _key_error(obj, key):
     return KeyError(f"'{key}'")
@@ -194,11 +859,11 @@ def _type_error(obj, key):
 
 
 def _get(dic: dict, key: Key, create: bool = False) -> Tuple[dict, Key]:
-    keys = list(normkey(key))
+    keys = _keytuple(key)
     ref = dic
     for idx, k in enumerate(keys[:-1]):
         try:
-            ref = ref[k]
+            ref = _getraw(ref, k)
         except KeyError:
             if not create:
                 raise _key_error(ref, ".".join(keys[: idx + 1]))
@@ -211,6 +876,15 @@ def _get(dic: dict, key: Key, create: bool = False) -> Tuple[dict, Key]:
     return ref, keys[-1]
 
 
+def _getraw(ref: Any, key: str) -> Any:
+    # Look up a single, already split key without parsing it again.
+    return dict.__getitem__(ref, key) if isinstance(ref, dict) else ref[key]
+
+
+def _hasraw(ref: Any, key: str) -> bool:
+    return dict.__contains__(ref, key) if isinstance(ref, dict) else key in ref
+
+
 def get(dic: dict, key: Key) -> Any:
     ref, key = _get(dic, key)
     return ref[key]
@@ -233,34 +907,41 @@ def normkey(key: Key) -> Generator[str, None, None]:
     Raises:
         TypeError: When input key is neither :class:`str` or :class:`tuple`.
     """
+    for k in _keytuple(key):
+        yield k
+
+
+def _keytuple(key: Key) -> Tuple[str, ...]:
     if isinstance(key, tuple):
-        for k in key:
-            yield k
-    elif isinstance(key, str):
-        if "." in key:
-            for k in re.split(r"(?<!\\)\.", key):
-                yield k
-        else:
-            yield key
-    else:
-        raise TypeError("key must be str or tuple")
+        return key
+    if isinstance(key, str):
+        return _splitkey(key)
+    raise TypeError("key must be str or tuple")
 
 
-def __merge(a, b):
-    for k in b:
-        if k in a:
-            if isdict(a[k]):
-                if isdict(b[k]):
-                    __merge(a[k], b[k])
-                else:
-                    if a[k] != b[k]:
-                        a[k] = b[k]
-            else:
-                if a[k] != b[k]:
-                    a[k] = b[k]
-        else:
-            a[k] = b[k]
-    return a
+@lru_cache(maxsize=_KEY_CACHE_SIZE)
+def _splitkey(key: str) -> Tuple[str, ...]:
+    if "." in key:
+        return tuple(_key_delimiter.split(key))
+    return (key,)
+
+
+def keycache_info():
+    """Get the statistics of the parsed key cache.
+
+    String keys are split on the “.” delimiter only once, and the parsed keys are
+    shared by all :class:`ONDict` objects through a bounded, thread-safe cache.
+
+    Returns:
+        A named tuple of ``hits``, ``misses``, ``maxsize``, and ``currsize``, as
+        returned by :func:`functools.lru_cache`.
+    """
+    return _splitkey.cache_info()
+
+
+def keycache_clear():
+    """Clear the parsed key cache and its statistics."""
+    _splitkey.cache_clear()
 
 
 def merge(a: dict, b: dict) -> dict:
@@ -269,7 +950,114 @@ def merge(a: dict, b: dict) -> dict:
     If either dict has leaves that are non-dicts, the leaf in dict b overwrites that in
     dict a.
     """
-    return __merge(a, b)
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        for k in y:
+            if k in x and isdict(x[k]) and isdict(y[k]):
+                stack.append((x[k], y[k]))
+            elif k not in x or x[k] != y[k]:
+                x[k] = y[k]
+    return a
+
+
+class Change(NamedTuple):
+    """Change to an item between two configs, as found by :func:`diff`."""
+
+    action: Action
+    """One of :attr:`~.Action.ADDED`, :attr:`~.Action.MODIFIED`, and
+    :attr:`~.Action.REMOVED`."""
+
+    key: Tuple[str, ...]
+    """Key tuple to the item."""
+
+    old: Any
+    """Old value, or :obj:`None` if the item is added."""
+
+    new: Any
+    """New value, or :obj:`None` if the item is removed."""
+
+
+def diff(a: Mapping, b: Mapping, partial: bool = False) -> List[Change]:
+    """Compute the changes from config a to config b.
+
+    A nested mapping that exists in only one of the configs is reported as a single
+    change of the whole mapping, and nested mappings existing in both are compared item
+    by item, so that a change is reported only at the key where the configs diverge.
+    The changes are ordered depth-first, following the order of keys in b, with the
+    removals within a mapping after the other changes.
+
+    The old and new values of the changes are references to, not copies of, the values
+    in the configs.
+
+    Args:
+        a: Old config.
+        b: New config.
+        partial: :obj:`True` if b only has the items to be merged into a, as in
+            :func:`merge`, in which case items missing from b are not removed.
+
+    Returns:
+        List of :class:`Change` objects.
+    """
+    return list(iterdiff(a, b, partial))
+
+
+def iterdiff(
+    a: Mapping, b: Mapping, partial: bool = False
+) -> Generator[Change, None, None]:
+    """Generate the changes from config a to config b lazily.
+
+    See :func:`diff` for the arguments.
+    """
+    stack = [((), a, b, iter(b.items()))]
+    while stack:
+        prefix, x, y, items = stack[-1]
+        for k, v in items:
+            try:
+                old = _getraw(x, k)
+            except KeyError:
+                yield Change(Action.ADDED, prefix + (k,), None, v)
+                continue
+            if old is v or _samedigest(old, v):
+                continue
+            if _isnode(old) and _isnode(v):
+                stack.append((prefix + (k,), old, v, iter(v.items())))
+                break
+            if not equal(old, v):
+                yield Change(Action.MODIFIED, prefix + (k,), old, v)
+        else:
+            stack.pop()
+            if not partial:
+                for k, old in x.items():
+                    if not _hasraw(y, k):
+                        yield Change(Action.REMOVED, prefix + (k,), old, None)
+
+
+def equal(a: Any, b: Any) -> bool:
+    """Test if two values are equal, comparing nested dicts without recursion.
+
+    The result is the same as ``a == b``, including the order of keys being
+    significant only between :class:`~collections.OrderedDict` objects.
+    """
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if x is y or _samedigest(x, y):
+            continue
+        if isdict(x) and isdict(y):
+            if len(x) != len(y):
+                return False
+            if isinstance(x, OrderedDict) and isinstance(y, OrderedDict):
+                if list(x.keys()) != list(y.keys()):
+                    return False
+            for k, v in x.items():
+                try:
+                    stack.append((v, _getraw(y, k)))
+                except KeyError:
+                    return False
+        elif x != y:
+            return False
+    return True
 
 
 def normalize(
@@ -292,37 +1080,63 @@ def normalize(
         return d
     cls = cls or d.__class__
     new = cls()
-    for key, value in d.items():
-        keys = list(normkey(key))
-        if len(keys) == 1:
-            k = keys[0]
-            expanded = normalize(value, cls=cls)
-            new[k] = (
-                merge(new[k], expanded)
-                if k in new and isinstance(new[k], MutableMapping)
-                else expanded
-            )
-        else:
-            ref = new
-            for idx, k in enumerate(keys[:-1]):
-                if k not in ref:
-                    ref[k] = cls()
-                ref = ref[k]
-                if not isinstance(ref, MutableMapping):
-                    k = ".".join(keys[: idx + 1])
+
+    # Each frame holds the items being expanded, the mapping they are expanded into,
+    # and the node and key at which that mapping is stored once all the items are done.
+    stack = [(iter(d.items()), new, None, None)]
+    while stack:
+        items, expanded, ref, k = stack[-1]
+        for key, value in items:
+            keys = _keytuple(key)
+            parent = expanded
+            for idx, subkey in enumerate(keys[:-1]):
+                if subkey not in parent:
+                    parent[subkey] = cls()
+                parent = parent[subkey]
+                if not isinstance(parent, MutableMapping):
+                    subkey = ".".join(keys[: idx + 1])
                     raise TypeError(
-                        f"cannot convert a node from non-dict to dict at '{k}'"
+                        f"cannot convert a node from non-dict to dict at '{subkey}'"
                     )
-            k = keys[-1]
-            expanded = normalize(value, cls=cls)
-            ref[k] = (
-                merge(ref[k], expanded)
-                if k in ref and isinstance(ref[k], MutableMapping)
-                else expanded
-            )
+            if isinstance(value, MutableMapping):
+                stack.append((iter(value.items()), cls(), parent, keys[-1]))
+                break
+            _put(parent, keys[-1], value)
+        else:
+            stack.pop()
+            if ref is not None:
+                _put(ref, k, expanded)
     return new
 
 
+def _pairs(items: Iterable) -> Generator[Tuple[Key, Any], None, None]:
+    # Validate the items of a dict update sequence as dict.update() does.
+    for i, item in enumerate(items):
+        try:
+            key, value = item
+        except (TypeError, ValueError):
+            try:
+                length = len(item)
+            except TypeError:
+                raise TypeError(
+                    f"cannot convert dictionary update sequence element #{i} to a "
+                    "sequence"
+                )
+            raise ValueError(
+                f"dictionary update sequence element #{i} has length {length}; 2 is "
+                "required"
+            )
+        yield key, value
+
+
+def _put(ref: Mapping, key: str, value: Any):
+    ref[key] = (
+        merge(ref[key], value)
+        if key in ref and isinstance(ref[key], MutableMapping)
+        else value
+    )
+
+
 def flexdictargs(func: Callable[[dict], RT]) -> Callable[[Iterable, Any], RT]:
     """Decorate a method to add dict.update()-like interface.
 
@@ -1,28 +1,56 @@
+import asyncio
 import os
+import threading
+from collections import OrderedDict
+from collections import deque
 from collections.abc import Iterable
+from contextlib import contextmanager
 from copy import deepcopy
+from datetime import datetime
 from enum import Enum
+from functools import partial
 from logging import getLogger
 
 from .actions import Action
+from .aio import Coalescer
 from .clargs import CLArgs
+from .fields import Bool
+from .fields import Datetime
 from .fields import Field
+from .fields import FieldTable
+from .fields import Float
+from .fields import Int
+from .fields import Str
 from .fields import extract_values
 from .io import IO
-from .io.io import read_from_files_as_dict
+from .io.paths import ConfigPath
 from .io.utils import ensure_path
+from .locks import NullLock
+from .locks import RWLock
+from .ondict import BaseONDict
+from .ondict import FrozenONDict
+from .ondict import IndexedONDict
 from .ondict import ONDict
 from .ondict import flexdictargs
 from .ondict import isdict
+from .ondict import iterdiff
 from .ondict import merge
+from .ondict import normkey
 from .typing import Any
+from .typing import Callable
 from .typing import Dict
 from .typing import FilePath
+from .typing import Generator
 from .typing import Key
 from .typing import List
+from .typing import Mapping
 from .typing import Optional
 from .typing import Tuple
+from .typing import Type
+from .typing import Union
 from .typing import WatchFunction
+from .views import Accessor
+from .views import ConfigView
 from .watchers import Watchable
 from .watchers import Watchers
 
@@ -37,6 +65,51 @@ class Flag(Enum):
     """Flag config item to be removed."""
 
 
+class _Frame:
+    """State of a dict node being updated."""
+
+    __slots__ = (
+        "key",
+        "newconf",
+        "watchers",
+        "items",
+        "node",
+        "orig",
+        "oldval",
+        "oldlen",
+        "empty",
+        "same",
+        "changed",
+    )
+
+    def __init__(
+        self, key: Tuple[str, ...], newconf: dict, watchers: Optional[Watchers]
+    ):
+        self.key = key  # Tuple of keys to the node
+        self.newconf = newconf  # New config at the node
+        self.watchers = watchers  # Watchers for the node, if any
+        self.items = iter(newconf.keys())  # Keys of the new config left to visit
+        self.node = None  # The node in the active config
+        self.orig = None  # The node in the published config, if it is being copied
+        self.oldval = None  # Old value, if it is needed for the watch functions
+        self.oldlen = -1  # Number of items in the old value, if it is a dict
+        self.empty = False  # True if the old value is empty
+        self.same = False  # True if the node has the same items as before so far
+        self.changed = 0  # Number of items added or modified
+
+
+class _Generations:
+    """Generations of a config node."""
+
+    __slots__ = ("key", "subtree", "removed", "children")
+
+    def __init__(self):
+        self.key = 0  # Generation in which the value at the node last changed
+        self.subtree = 0  # Generation in which an item nested under it last changed
+        self.removed = 0  # Generation in which an item was last removed from it
+        self.children = {}  # Generations of the nested nodes
+
+
 class ResConfig(Watchable, IO, CLArgs):
     """An application resource configuration.
 
@@ -46,26 +119,57 @@ class ResConfig(Watchable, IO, CLArgs):
         default: Default config.
         config_files: List of config filename paths.
         envvar_prefix: Prefix used for environment variables used as configuration.
-        load_on_init: :obj:`True` to load config on instantiation, :obj:`False` to skip.
+        load_on_init: :obj:`True` to load config on instantiation, :obj:`False` to skip,
+            or ``"lazy"`` to defer the load until the config is first accessed.
         merge_config_files: :obj:`True` to merge all configs from existing files,
             :obj:`False` to read only the config from the first existing file.
         watchers: Config watchers.
+        ondict_class: The :class:`~resconfig.ondict.ONDict` class used to store the
+            active config, e.g., :class:`~resconfig.ondict.IndexedONDict` for the
+            constant time lookup of nested keys. Defaults to
+            :attr:`ResConfig.ondict_class`.
+        concurrency: ``"copy-on-write"`` to update a copy of the active config and
+            publish it at once, so that readers in other threads always see a
+            consistent config without locking, ``"lock"`` to guard the config with a
+            reader-writer lock, or :obj:`None` for no thread safety.
+        history: Number of past configs kept for :meth:`rollback`, or ``0`` to keep
+            none.
     """
 
+    ondict_class = ONDict
+    """The default :class:`~resconfig.ondict.ONDict` class used to store the active
+    config, e.g., :class:`~resconfig.ondict.DictONDict` to save memory."""
+
     def __init__(
         self,
         default: Optional[dict] = None,
         config_files: Optional[List[FilePath]] = None,
         envvar_prefix: str = "",
-        load_on_init: bool = True,
+        load_on_init: Union[bool, str] = True,
         merge_config_files: bool = True,
         watchers: Optional[Dict[Key, List[WatchFunction]]] = None,
+        ondict_class: Optional[Type[BaseONDict]] = None,
+        concurrency: Optional[str] = None,
+        history: int = 0,
     ):
-        self._default = ONDict(default or {})
+        if concurrency not in (None, "copy-on-write", "lock"):
+            raise ValueError(f"unknown concurrency mode: {concurrency!r}")
+        self._concurrency = concurrency
+
+        # Guards the config, watch functions, and command-line config in the lock mode.
+        self._lock = RWLock() if concurrency == "lock" else NullLock()
+
+        # Serializes the writers, and is held by a thread throughout its transaction.
+        self._write_lock = threading.RLock()
+
+        # The default is indexed, as its keys are listed on every load.
+        self._default = IndexedONDict(default or {})
+        self._fields = FieldTable.compile(self._default)
         self._config_files = (
             [ensure_path(p) for p in config_files] if config_files else []
         )
         self._envvar_prefix = envvar_prefix
+        self._envkeys = self.__map_envkeys()
         self._clargs = ONDict()
         self._merge_config_files = merge_config_files
         self._watchers = Watchers()
@@ -74,185 +178,852 @@ class ResConfig(Watchable, IO, CLArgs):
                 self.register(k, v)
 
         # This is where the active config is stored.
-        self._conf = ONDict()
+        self._conf = (ondict_class or self.ondict_class)()
+
+        # The immutable snapshot of the active config, built on demand, or kept from
+        # the start with the history, which holds the snapshots of the past configs.
+        self._snapshot = FrozenONDict() if history else None
+        self._history = deque(maxlen=history) if history else None
+
+        # Incremented whenever the active config changes.
+        self._generation = 0
+
+        # The generations in which the items at the keys, and any items nested under
+        # the keys, last changed, in a tree of the existing keys.
+        self._generations = _Generations()
+
+        # The config staged by the updates within a transaction, per thread.
+        self._local = threading.local()
 
-        if load_on_init:
+        # The layers of the config read from the sources, in the order of precedence,
+        # replaced as a whole by the writers, so that it can be read without locking.
+        self._layers = OrderedDict()
+
+        # The root of the config being updated, and the watch functions to be
+        # triggered after the update.
+        self.__root = self._conf
+        self.__pending = None
+
+        # The load deferred until first access with the lazy loading.
+        self._load_pending = load_on_init == "lazy"
+        self._load_lock = threading.Lock()
+
+        # Coalesces the concurrent asynchronous loads and updates from files.
+        self._coalescer = Coalescer()
+
+        # The snapshot file attached to, and the version and the file object last read,
+        # replaced holding the lock, which is reentrant for the watch functions to sync.
+        self._attached = None
+        self._attach_lock = threading.RLock()
+
+        if load_on_init and not self._load_pending:
             self.load()
 
+    def _ensure_loaded(self):
+        """Load the config if the load has been deferred until first access.
+
+        The load is performed only once, even when the config is first accessed from
+        multiple threads at once.
+        """
+        if self._load_pending:
+            with self._load_lock:
+                if self._load_pending:
+                    self.load()
+
     def __contains__(self, key):
-        return key in self._conf
+        self._ensure_loaded()
+        with self._lock.read():
+            return key in self._conf
 
     def __getitem__(self, key):
-        if key not in self:
-            raise KeyError(key)
-        return self.get(key)
+        self._ensure_loaded()
+        with self._lock.read():
+            try:
+                value = self._conf[key]
+            except Exception:
+                raise KeyError(key)
+            return deepcopy(value)
 
     def _asdict(self) -> dict:
         """Return the config as a dict object."""
-        return dict(deepcopy(self._conf))
+        self._ensure_loaded()
+        with self._lock.read():
+            return dict(deepcopy(self._conf))
 
-    def _prepare_config(self) -> ONDict:
+    def _prepare_config(
+        self, files: Optional["OrderedDict[str, ONDict]"] = None
+    ) -> ONDict:
         """Prepare a new :class:`ONDict` object with the current object state.
 
+        All the layers are read from their sources (see :meth:`load_layer`) and resolved
+        into the config. As this replaces the layers, it is called by the writer holding
+        the lock.
+
+        Args:
+            files: The layers of the config files already read, if any.
+
         Returns:
              An :class:`~resconfig.ondict.ONDict` object.
         """
-        new = deepcopy(extract_values(self._default))
+        layers = OrderedDict([("default", self.__read_default())])
+        layers.update(self.__read_files() if files is None else files)
+        layers["env"] = self.__read_env()
+        layers["clargs"] = self.__read_clargs()
+        self._layers = layers
 
-        if self._config_files:
-            new.merge(
-                read_from_files_as_dict(self._config_files, self._merge_config_files)
-            )
+        keys = OrderedDict()
+        for layer in layers.values():
+            keys.update(dict.fromkeys(layer.keys()))
+        new = ONDict()
+        for key in keys:
+            new[(key,)] = self.__resolve(key)
+        return new
+
+    def __read_default(self) -> ONDict:
+        return deepcopy(extract_values(self._default, self._fields))
+
+    def __read_files(self) -> "OrderedDict[str, ONDict]":
+        # Each config file is a layer, in the order of precedence. Without merging, only
+        # the first existing file is read, and the others are left empty.
+        paths = [p for p in self._config_files if p.is_file()]
+        if not self._merge_config_files:
+            paths = paths[:1]
+        layers = OrderedDict()
+        for path in reversed(self._config_files):
+            layers[str(path)] = self.__read_file(path) if path in paths else ONDict()
+        return layers
+
+    def __read_file(self, path: FilePath) -> ONDict:
+        if not isinstance(path, ConfigPath):
+            path = ConfigPath.from_extension(path)
+        return path.load()
+
+    def __read_env(self) -> ONDict:
+        prefix = self._envvar_prefix
+        envkeys = self._envkeys
+        items = []
+        for envkey, value in os.environ.items():
+            if envkey.startswith(prefix) and envkey in envkeys:
+                for key in envkeys[envkey]:
+                    items.append((key, value))
+                    log.debug(
+                        "Config item '%s' set from environment variable (%s)",
+                        key,
+                        envkey,
+                    )
+        return ONDict.from_items(items)
+
+    def __read_clargs(self) -> ONDict:
+        default = self._default
+        items = []
+        for key in self._clargs.allkeys():
+            value = self._clargs[key]
+            if value is not None and key in default and not isdict(default[key]):
+                items.append((key, value))
+                log.debug("Config item '%s' set from command-line", key)
+        return ONDict.from_items(items)
+
+    def __merge_layers(self, new: "OrderedDict[str, ONDict]") -> dict:
+        # Replace the layers, and return the update resolving again only the top-level
+        # sections found in the replaced layers before or after. The other sections are
+        # passed as the very nodes of the active config, so that the update skips them.
+        layers = self._layers.copy()
+        keys = OrderedDict()
+        for name, layer in new.items():
+            keys.update(dict.fromkeys(layers[name].keys()))
+            keys.update(dict.fromkeys(layer.keys()))
+            layers[name] = layer
+        self._layers = layers
+
+        with self._lock.read():
+            conf = dict(dict.items(self._conf))
+        for key in keys:
+            value = self.__resolve(key)
+            if value is Flag.MISSING:
+                conf.pop(key, None)
+            else:
+                conf[key] = value
+        return conf
+
+    def __resolve(self, key: str) -> Any:
+        # Resolve the value at the top-level key by merging the layers in the order of
+        # precedence. The nested mappings are copied, so that the layers are intact.
+        value = Flag.MISSING
+        for layer in self._layers.values():
+            if dict.__contains__(layer, key):
+                v = dict.__getitem__(layer, key)
+                if isdict(v):
+                    v = ONDict.from_mapping(v, trusted=True)
+                    if isdict(value):
+                        merge(value, v)
+                        continue
+                value = v
+        return value
+
+    @property
+    def layers(self) -> Tuple[str, ...]:
+        """The names of the layers of the config, in the order of precedence.
+
+        The names are ``"default"``, the paths of the config files, ``"env"``, and
+        ``"clargs"``. The layers are read on :meth:`load`.
+        """
+        return tuple(self._layers)
+
+    def load_layer(self, name: str):
+        """Read the layer again from its source and apply the changes to the config.
+
+        The config is resolved from the layers read from the sources, in the order of
+        precedence: the default, the config files, the environment variables, and the
+        command-line arguments (see :meth:`prepare_from_argparse`). Whereas
+        :meth:`load` reads all the layers, this reads only the named layer, e.g., when
+        a config file has changed, and resolves again only the top-level sections of the
+        config found in the layer before or after. The other sections are left as they
+        are, and no watch functions for them are triggered.
+
+        Without ``merge_config_files``, all the config files are read again, as which of
+        them is read may change.
 
-        env = os.environ
-        clargs = self._clargs
+        Args:
+            name: ``"default"``, a config file path, ``"env"``, or ``"clargs"``.
+
+        Raises:
+            KeyError: When the layer does not exist.
+        """
+        self._ensure_loaded()
+        if name not in self._layers:
+            name = str(ensure_path(name))
+            if name not in self._layers:
+                raise KeyError(f"layer does not exist: {name}")
+
+        # The layer is read before taking the lock, and merged holding it.
+        if name == "default":
+            new = OrderedDict([(name, self.__read_default())])
+        elif name == "env":
+            new = OrderedDict([(name, self.__read_env())])
+        elif name == "clargs":
+            new = OrderedDict([(name, self.__read_clargs())])
+        elif self._merge_config_files:
+            path = next(p for p in self._config_files if str(p) == name)
+            layer = self.__read_file(path) if path.is_file() else ONDict()
+            new = OrderedDict([(name, layer)])
+        else:
+            new = self.__read_files()
+        self.__update_root(partial(self.__merge_layers, new), replace=True)
+
+    def __map_envkeys(self) -> Dict[str, List[Tuple[str, ...]]]:
+        # Map the environment variable names to the default config keys, computed once,
+        # so that loading only looks up the environment variables set.
+        envkeys = {}
         for key in self._default.allkeys():
             envkey = self._envvar_prefix + "_".join(
                 k.replace(r"\.", "_").upper() for k in key
             )
-            if envkey in env:
-                new[key] = env[envkey]
-                log.debug(
-                    "Config item '%s' set from environment variable (%s)", key, envkey
-                )
+            envkeys.setdefault(envkey, []).append(key)
+        return envkeys
 
-            if key in clargs and clargs[key] is not None:
-                new[key] = clargs[key]
-                log.debug("Config item '%s' set from command-line", key)
+    def get(self, key: Key, default: Optional[Any] = None, copy: bool = True) -> Any:
+        """Return the config value for key if it exists, else default.
 
-        return new
+        By default, the returned value is a deep copy, which the caller is free to
+        mutate. With ``copy=False``, the value is returned without copying; a mapping is
+        returned as a read-only :class:`~resconfig.views.ConfigView` (see
+        :meth:`view`), and other values are returned as they are stored and should not
+        be mutated.
 
-    def get(self, key: Key, default: Optional[Any] = None) -> Any:
-        """Return the config value for key if it exists, else default.
+        Args:
+            key: Config key.
+            default: Default value if key is not in config.
+            copy: :obj:`False` to skip copying the value.
+
+        Returns:
+            The value found for the key.
+        """
+        self._ensure_loaded()
+        with self._lock.read():
+            generation = self._generation
+            try:
+                value = self._conf[key]
+            except Exception:
+                return default
+            if not copy:
+                return self.__view(value, generation) if isdict(value) else value
+            return deepcopy(value)
+
+    def get_bool(
+        self, key: Key, default: Optional[bool] = None, cast: bool = False
+    ) -> Optional[bool]:
+        """Return the :class:`bool` config value for key if it exists, else default.
+
+        See :meth:`get_int` for detail.
+        """
+        return self.__get_scalar(key, default, Bool, cast)
+
+    def get_datetime(
+        self, key: Key, default: Optional[datetime] = None, cast: bool = False
+    ) -> Optional[datetime]:
+        """Return the datetime config value for key if it exists, else default.
+
+        See :meth:`get_int` for detail.
+        """
+        return self.__get_scalar(key, default, Datetime, cast)
+
+    def get_float(
+        self, key: Key, default: Optional[float] = None, cast: bool = False
+    ) -> Optional[float]:
+        """Return the :class:`float` config value for key if it exists, else default.
+
+        See :meth:`get_int` for detail.
+        """
+        return self.__get_scalar(key, default, Float, cast)
+
+    def get_int(
+        self, key: Key, default: Optional[int] = None, cast: bool = False
+    ) -> Optional[int]:
+        """Return the :class:`int` config value for key if it exists, else default.
+
+        Unlike :meth:`get`, the value is returned without copying, as it is immutable.
+        With ``cast``, the value is converted with the corresponding
+        :mod:`~resconfig.fields` class, e.g., ``"8080"`` to ``8080``
+        (:class:`~resconfig.fields.Int`) or ``"false"`` to :obj:`False`
+        (:class:`~resconfig.fields.Bool`). The default is returned as it is. A
+        :class:`bool` value is not taken for a number.
 
         Args:
             key: Config key.
             default: Default value if key is not in config.
+            cast: :obj:`True` to convert the value to the type.
 
         Returns:
             The value found for the key.
+
+        Raises:
+            TypeError: When the value is not of the type, and ``cast`` is
+                :obj:`False`.
+            ValueError: When the value cannot be converted, and ``cast`` is
+                :obj:`True`.
+        """
+        return self.__get_scalar(key, default, Int, cast)
+
+    def get_str(
+        self, key: Key, default: Optional[str] = None, cast: bool = False
+    ) -> Optional[str]:
+        """Return the :class:`str` config value for key if it exists, else default.
+
+        See :meth:`get_int` for detail.
+        """
+        return self.__get_scalar(key, default, Str, cast)
+
+    def __get_scalar(
+        self, key: Key, default: Any, field: Type[Field], cast: bool
+    ) -> Any:
+        self._ensure_loaded()
+        with self._lock.read():
+            try:
+                value = self._conf[key]
+            except Exception:
+                return default
+        if cast:
+            return field.from_obj(value)
+        if not isinstance(value, field.ftype) or (
+            isinstance(value, bool) and field.ftype is not bool
+        ):
+            raise TypeError(f"config value at '{key}' is not {field.ftype.__name__}")
+        return value
+
+    def accessor(self, key: Key, default: Optional[Any] = None) -> Accessor:
+        """Return a callable reading the config value at key.
+
+        The returned :class:`~resconfig.views.Accessor` object resolves the key once
+        and caches the value until the config changes, so that it is suitable for
+        reading the same key repeatedly, e.g., in a tight loop::
+
+            timeout = config.accessor("db.timeout")
+            for item in items:
+                process(item, timeout=timeout())
+
+        Like :meth:`get` with ``copy=False``, the value is not copied.
+
+        Args:
+            key: Config key.
+            default: Value returned when the key does not exist.
+
+        Returns:
+            An :class:`~resconfig.views.Accessor` object.
         """
-        try:
-            value = self._conf[key]
-        except Exception:
-            return default
-        return deepcopy(value)
+        return Accessor(self, key, default)
+
+    def view(self, key: Optional[Key] = None) -> ConfigView:
+        """Return a read-only view of the config at key.
+
+        The view reads the live config without copying it. It is valid only until the
+        config next changes; after that, access to the view raises
+        :class:`~resconfig.views.StaleViewError`, and a new view has to be obtained.
+
+        Args:
+            key: Config key of a nested mapping, or :obj:`None` for the whole config.
+
+        Returns:
+            A :class:`~resconfig.views.ConfigView` object.
+
+        Raises:
+            KeyError: When the key does not exist.
+            TypeError: When the value at the key is not a mapping.
+        """
+        self._ensure_loaded()
+        with self._lock.read():
+            generation = self._generation
+            conf = self._conf
+            value = conf if key is None else conf[key]
+        if not isdict(value):
+            raise TypeError(f"config value at '{key}' is not a mapping")
+        return self.__view(value, generation)
+
+    def __view(self, node: dict, generation: int) -> ConfigView:
+        # The generation is read before the node, so that a view of a node replaced
+        # concurrently is never taken as current.
+        return ConfigView(self, node, generation)
+
+    def snapshot(self) -> FrozenONDict:
+        """Return an immutable snapshot of the config.
+
+        The snapshot is a :class:`~resconfig.ondict.FrozenONDict` object, from which
+        values, including nested mappings, can be read without copying. Once taken, the
+        snapshot is kept up to date on update; the new snapshot shares all the unchanged
+        nested mappings with the previous one, so that its cost is in proportion to the
+        size of the change, not the config.
+
+        Returns:
+            A :class:`~resconfig.ondict.FrozenONDict` object.
+        """
+        self._ensure_loaded()
+        snapshot = self._snapshot
+        if snapshot is None:
+            # The snapshot is built holding the writer lock, so that no update is
+            # published before it is set to be kept up to date.
+            with self._write_lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    snapshot = self._snapshot = FrozenONDict(self._conf)
+        return snapshot
+
+    def fingerprint(self) -> str:
+        """Return a stable hash of the config.
+
+        The hash is that of the snapshot (see :meth:`snapshot`), which is cached per
+        nested mapping, so that it is recomputed only for the nested mappings changed
+        since the last call. Configs with the same items have the same hash regardless
+        of the order of keys.
+
+        Returns:
+            Hex digest string.
+        """
+        return self.snapshot().fingerprint()
+
+    def generation(self, key: Optional[Key] = None) -> int:
+        """Return the generation of the config.
+
+        The generation is a number incremented whenever the config changes, so that
+        polling it is a cheap way to know if the config has changed:
+
+        .. code-block:: python
+
+            generation = config.generation("db")
+            pool = create_pool(config.get("db"))
+            ...
+            if config.changed_since(generation, "db"):
+                ...  # Rebuild the pool
+
+        For a key, the generation is that in which the value at the key, including the
+        items nested under it, last changed, or ``0`` if it has never changed. For a key
+        not in the config, it is no earlier than that in which the key was removed.
+
+        Args:
+            key: Config key, or :obj:`None` for the whole config.
+
+        Returns:
+            The generation number.
+        """
+        self._ensure_loaded()
+        if key is None:
+            return self._generation
+        node = self._generations
+        generation = 0
+        for k in normkey(key):
+            child = node.children.get(k)
+            if child is None:
+                # The generations under the removed keys are not kept.
+                return max(generation, node.removed)
+            node = child
+            generation = max(generation, node.key)
+        return max(generation, node.subtree)
+
+    def changed_since(self, generation: int, key: Optional[Key] = None) -> bool:
+        """Test if the config has changed since the generation.
+
+        Args:
+            generation: Generation returned from :meth:`generation`.
+            key: Config key, or :obj:`None` for the whole config.
+
+        Returns:
+            :obj:`True` if the config at the key has changed since the generation.
+        """
+        return self.generation(key) > generation
 
     def load(self):
         """Load the prepared config."""
-        self.replace(self._prepare_config())
+        self.__update_root(self._prepare_config, replace=True, load=True)
+
+    async def aload(self):
+        """Load the prepared config asynchronously.
+
+        The config files are read and parsed in the default executor of the event loop,
+        and the config is then updated in the event loop thread, as with :meth:`load`.
+        The loads requested while another is in progress are coalesced into one made
+        after it, so that only one reads the files at a time.
+        """
+        await self._coalescer(("load",), self.__aload)
+
+    async def __aload(self):
+        loop = asyncio.get_event_loop()
+        files = await loop.run_in_executor(None, self.__read_files)
+        self.__update_root(
+            partial(self._prepare_config, files), replace=True, load=True
+        )
 
     def unload(self):
         """Empty the configuration."""
         self.replace(ONDict())
 
-    def __update(
-        self, key: Tuple[str], conf: dict, newconf: dict, replace: bool = False
-    ) -> Tuple[Action, Any, Any]:
-        """Perform config update recursively.
+    def __update(self, conf: dict, replace: bool = False):
+        """Perform config update.
+
+        The new config is merged into the active config in place (or its copy in the
+        copy-on-write mode), or replaces it with ``replace``, and the watch functions
+        for the changed keys are triggered, nested keys before the nodes holding them.
 
-        Tuple of keys to the current node ``k`` holds the full path from the root, i.e.,
-        ``("root", "k1", "k2", ..., "k")``, where ``conf["k"]`` and ``newconf["k"]`` is
-        the node to be inspected at the current call stack. The full key path needs to
-        be retained this way to notify watch functions.
+        The nested nodes are visited depth-first with an explicit stack of frames, so
+        that deeply nested configs do not hit the recursion limit. Each frame holds the
+        state of a node being updated (see :class:`_Frame`).
+
+        No value is copied for the nodes without watch functions. For a watched node,
+        the old value is deep-copied on entering the node, since the node is updated in
+        place, and the updated node is deep-copied as the new value. Replaced and
+        removed values are passed without copying, as they no longer belong to the
+        config. The watch functions are collected to be triggered after the update is
+        published, so that an update made by a watch function does not interfere with
+        the one in progress.
 
         Args:
-            key: Tuple of keys to the current node.
-            conf: Old config to be updated.
-            newconf: New config to update with.
+            conf: New config to update with.
             replace: :obj:`True` to perform replacement instead of merge.
-
-        Returns:
-            A tuple of action, old value, and new value for the current key.
         """
-        _key = key[-1]
-
-        if not isdict(newconf[_key]):
-            if key[1:] in self._default:
-                vt = self._default[key[1:]]
-                if isinstance(vt, Field):
-                    newval = vt.cast(newconf[_key])
-                else:
-                    newval = newconf[_key]
+        stack = [self.__enter_node((), None, conf, self._watchers)]
+        while stack:
+            frame = stack[-1]
+            for subkey in frame.items:
+                newval = frame.newconf[subkey]
+                if isdict(newval) and (
+                    newval is dict.get(frame.node, subkey)
+                    or frame.orig is not None
+                    and newval is dict.get(frame.orig, subkey)
+                ):
+                    continue  # The node itself is given; nothing to update
+                watchers = frame.watchers and frame.watchers.child(subkey)
+                if isdict(newval):
+                    stack.append(
+                        self.__enter_node(
+                            frame.key + (subkey,), frame, newval, watchers
+                        )
+                    )
+                    break
+                result = self.__update_leaf(frame, subkey, newval)
+                self.__apply(frame, subkey, watchers, *result)
             else:
-                newval = newconf[_key]
+                stack.pop()
+                result = self.__leave_node(frame, replace)
+                if stack:
+                    self.__apply(stack[-1], frame.key[-1], frame.watchers, *result)
 
-            action = None
-            if not isdict(conf):
-                oldval = Flag.MISSING
-                if newval is not Flag.REMOVE:
-                    action = Action.ADDED
-            elif _key not in conf or conf[_key] is Flag.MISSING or not conf[_key]:
+    def __enter_node(
+        self,
+        key: Tuple[str, ...],
+        parent: Optional["_Frame"],
+        newconf: dict,
+        watchers: Optional[Watchers],
+    ) -> "_Frame":
+        frame = _Frame(key, newconf, watchers)
+        if parent is None:
+            node = self.__root
+            if node is not self._conf:
+                frame.orig = self._conf
+        elif key[-1] in parent.node:
+            node = parent.node[key[-1]]
+            if parent.orig is not None:
+                orig = dict.get(parent.orig, key[-1])
+                frame.orig = orig if isdict(orig) else None
+            if watchers and watchers.local_funcs():
+                # The published config is left intact in the copy-on-write mode.
+                frame.oldval = (
+                    deepcopy(node) if self.__root is self._conf else self._conf[key]
+                )
+        else:
+            node = Flag.MISSING
+            frame.oldval = Flag.MISSING
+
+        frame.empty = node is not Flag.MISSING and not node
+        if isdict(node):
+            frame.oldlen = len(node)
+            frame.same = True
+
+        # A leaf becomes a dict node once the new config has items under the key.
+        if node is Flag.MISSING or (newconf and not isdict(node)):
+            parent.node[key[-1]] = self.__root.__class__()
+            node = parent.node[key[-1]]
+            self.__changed.append(key)
+        frame.node = node
+        return frame
+
+    def __leave_node(self, frame: "_Frame", replace: bool) -> Tuple[Action, Any, Any]:
+        node = frame.node
+        if replace and isdict(node):
+            seen = set(frame.newconf.keys())
+            for subkey in [k for k in node.keys() if k not in seen]:
+                watchers = frame.watchers and frame.watchers.child(subkey)
+                if watchers:
+                    self.__trigger(watchers, Action.REMOVED, node[subkey], Flag.REMOVE)
+                del node[subkey]
+                frame.same = False
+                self.__changed.append(frame.key + (subkey,))
+                self.__removed.append(frame.key + (subkey,))
+
+        # Define the action performed on this dict node.
+        action = None
+        oldval = frame.oldval
+        if frame.changed:
+            if oldval is Flag.MISSING or frame.empty:
+                action = Action.ADDED
                 oldval = Flag.MISSING
-                if newval is not Flag.REMOVE:
-                    action = Action.ADDED
-            else:
-                oldval = deepcopy(conf[_key])
-                if newval is Flag.REMOVE:
-                    action = Action.REMOVED
-                elif oldval != newval:
-                    action = Action.MODIFIED
-            return action, oldval, newval
+            elif not frame.same or frame.changed != frame.oldlen:
+                action = Action.MODIFIED
+        elif frame.empty:
+            action = Action.REMOVED
+            node = self.__root.__class__()
 
-        oldval_at_dict_node = deepcopy(conf[_key]) if _key in conf else Flag.MISSING
-        newval_at_dict_node = ONDict()
+        return action, oldval, node, frame.same
 
-        conf.setdefault(_key, ONDict())
+    def __update_leaf(
+        self, frame: "_Frame", subkey: str, newval: Any
+    ) -> Tuple[Action, Any, Any, bool]:
+        field = self._fields.get(frame.key + (subkey,))
+        if field is not None and newval is not Flag.REMOVE:
+            newval = field.from_obj(newval)
 
-        for subkey in newconf[_key].keys():
-            if not isdict(conf[_key]):
-                conf[_key] = ONDict()
+        action = None
+        same = False
+        oldval = dict.get(frame.node, subkey, Flag.MISSING)
+        if newval is Flag.REMOVE:
+            # A falsy value is removed as well.
+            if oldval is not Flag.MISSING:
+                action = Action.REMOVED
+        elif oldval is Flag.MISSING or not oldval:
+            same = oldval is not Flag.MISSING and oldval == newval
+            oldval = Flag.MISSING
+            action = Action.ADDED
+        elif oldval != newval:
+            action = Action.MODIFIED
+        return action, oldval, newval, same
 
-            action, oldval, newval = self.__update(
-                key + (subkey,), conf[_key], newconf[_key], replace=replace
-            )
+    def __apply(
+        self,
+        frame: "_Frame",
+        subkey: str,
+        watchers: Optional[Watchers],
+        action: Action,
+        oldval: Any,
+        newval: Any,
+        same: bool,
+    ):
+        # Actually update the config storage. A dict node has been updated in place.
+        if action in (Action.MODIFIED, Action.ADDED):
+            frame.changed += 1
+            frame.same = frame.same and same
+            old = dict.get(frame.node, subkey, Flag.MISSING)
+            if newval is not old:
+                frame.node[subkey] = newval
+                self.__changed.append(frame.key + (subkey,))
+                if isdict(old) and not isdict(newval):
+                    self.__pruned.append(frame.key + (subkey,))
 
-            # Actually update the config storage
-            if action in (Action.MODIFIED, Action.ADDED):
-                if isdict(newval):
-                    newval = merge(conf[_key][subkey], newval)
-                    newval_at_dict_node[subkey] = merge(
-                        newval_at_dict_node.setdefault(subkey, ONDict()), newval
-                    )
-                else:
-                    newval_at_dict_node[subkey] = newval
+        elif action in (Action.REMOVED,):
+            del frame.node[subkey]
+            frame.same = False
+            self.__changed.append(frame.key + (subkey,))
+            self.__removed.append(frame.key + (subkey,))
 
-                conf[_key][subkey] = newval
+        # If an action occurs, trigger its watch functions
+        if action is not None and watchers:
+            self.__trigger(watchers, action, oldval, newval)
 
-            elif action in (Action.REMOVED,):
-                del conf[_key][subkey]
-                if subkey in newval_at_dict_node:
-                    del newval_at_dict_node[subkey]
+    def __trigger(self, watchers: Watchers, action: Action, oldval: Any, newval: Any):
+        funcs = watchers.local_funcs()
+        if funcs and isdict(newval):
+            # The node is copied, so that the watch functions cannot alter the config.
+            newval = deepcopy(newval)
+        for func in funcs:
+            self.__pending.append((func, action, oldval, newval))
 
-            # If an action occurs, trigger its watch functions
-            if action is not None and self._watchers.exists(key[1:] + (subkey,)):
-                self._watchers.trigger(key[1:] + (subkey,), action, oldval, newval)
+    @property
+    def _in_transaction(self) -> bool:
+        return getattr(self._local, "in_transaction", False)
 
+    def __stage(self, conf: dict, replace: bool = False):
+        local = self._local
         if replace:
-            seen = set(newconf[_key].keys())
-            for subkey in (k for k in list(conf[_key].keys()) if k not in seen):
-                if self._watchers.exists(key[1:] + (subkey,)):
-                    self._watchers.trigger(
-                        key[1:] + (subkey,),
-                        Action.REMOVED,
-                        conf[_key][subkey],
-                        Flag.REMOVE,
-                    )
-                del conf[_key][subkey]
+            local.staged = self._conf.__class__.from_mapping(conf, trusted=True)
+            return
+        if local.staged is None:
+            local.staged = self._conf.__class__.from_mapping(self._conf, trusted=True)
+        stack = [(local.staged, conf)]
+        while stack:
+            node, newconf = stack.pop()
+            for k, v in newconf.items():
+                if v is Flag.REMOVE:
+                    node.pop((k,), None)
+                elif isdict(v):
+                    if not isdict(dict.get(node, k)):
+                        node[(k,)] = node.__class__()
+                    stack.append((node[(k,)], v))
+                else:
+                    node[(k,)] = v
 
-        # Define the action performed on this dict node.
-        action = None
-        if newval_at_dict_node:
-            if not oldval_at_dict_node or oldval_at_dict_node is Flag.MISSING:
-                action = Action.ADDED
-                oldval_at_dict_node = Flag.MISSING
+    def __update_root(
+        self,
+        conf: Union[dict, Callable[[], dict]],
+        replace: bool = False,
+        rollback: int = 0,
+        load: bool = False,
+    ):
+        # The update may be given as a function building it from the state guarded by
+        # the write lock, e.g., the layers, to be called holding the lock. With load,
+        # the update is the load of the config, after which no load is pending.
+        if self._in_transaction:
+            self.__stage(conf() if callable(conf) else conf, replace)
+            if load:
+                self._load_pending = False
+            return
+
+        # The watch functions are triggered after the update is published and the lock
+        # is released, so that they can read and update the config. The config is
+        # marked loaded before then, so that a watch function reading the config during
+        # a deferred load does not load it again, waiting on the load in progress.
+        with self._write_lock:
+            if callable(conf):
+                conf = conf()
+            pending = self.__commit(conf, replace, rollback)
+            if load:
+                self._load_pending = False
+        for func, action, oldval, newval in pending:
+            func(action, oldval, newval)
+
+    def __commit(
+        self, conf: dict, replace: bool = False, rollback: int = 0
+    ) -> List[Tuple[WatchFunction, Action, Any, Any]]:
+        # Apply the update, holding the write lock, and return the watch functions to
+        # be triggered.
+        with self._lock.write():
+            if rollback:
+                conf = self.__restore(rollback)
+            if next(iterdiff(self._conf, conf, partial=not replace), None) is None:
+                return []  # Nothing to be changed
+            self.__changed = []
+            self.__removed = []  # Keys removed
+            self.__pruned = []  # Keys of nested mappings replaced by leaves
+            self.__pending = []
+            if self._concurrency == "copy-on-write":
+                # Update a copy sharing the leaf values with the active config, and
+                # publish it by a single assignment, so that concurrent readers see
+                # either the old or the new config in whole.
+                self.__root = self._conf.__class__.from_mapping(
+                    self._conf, trusted=True
+                )
+            try:
+                self.__update(conf, replace=replace)
+                if self.__changed:
+                    self.__publish(self.__root, record=not rollback)
+                    for _ in range(rollback):
+                        self._history.pop()  # The configs rolled back over
+                return self.__pending
+            finally:
+                self.__root = self._conf
+                self.__pending = None
+
+    def __restore(self, n: int) -> dict:
+        # Return the update turning the active config into the past config restored,
+        # which is dropped from the history with the later ones once published. The
+        # unchanged nested mappings are shared between the snapshots and skipped, so
+        # that the update is as large as the changes.
+        history = self._history
+        if history is None:
+            raise IndexError("config history is not kept")
+        if not 0 < n <= len(history):
+            raise IndexError(f"config history has {len(history)} entries, not {n}")
+        return self.__delta(self._snapshot, history[-n])
+
+    def __delta(self, old: Mapping, new: Mapping) -> dict:
+        # Return the update turning the old config into the new one.
+        conf = {}
+        for change in iterdiff(old, new):
+            node = conf
+            for k in change.key[:-1]:
+                node = node.setdefault(k, {})
+            if change.action == Action.REMOVED:
+                value = Flag.REMOVE
+            elif isinstance(change.new, FrozenONDict):
+                value = change.new.thaw()
             else:
-                if newval_at_dict_node != oldval_at_dict_node:
-                    action = Action.MODIFIED
-        elif not oldval_at_dict_node:
-            action = Action.REMOVED
+                value = change.new
+            node[change.key[-1]] = value
+        return conf
 
-        return action, oldval_at_dict_node, newval_at_dict_node
+    def __publish(self, conf: dict, record: bool = True):
+        # The config is set before the generation is incremented, since readers read
+        # the generation first.
+        self._conf = conf
+        self._generation += 1
+        self.__update_generations(self._generation)
+        if self._snapshot is not None:
+            previous = self._snapshot
+            self._snapshot = previous.refresh(conf, self.__changed)
+            if self._history is not None and record:
+                self._history.append(previous)
+
+    def __update_generations(self, generation: int):
+        root = self._generations
+        for key in self.__changed:
+            node = root
+            for k in key:
+                node.subtree = generation
+                child = node.children.get(k)
+                if child is None:
+                    child = node.children[k] = _Generations()
+                node = child
+            node.key = generation
+
+        # The generations under the removed keys are dropped, so that they do not
+        # accumulate as keys come and go.
+        for keys, prune in ((self.__removed, False), (self.__pruned, True)):
+            for key in keys:
+                node = root
+                for k in key if prune else key[:-1]:
+                    node = node.children.get(k)
+                    if node is None:
+                        break
+                else:
+                    if prune:
+                        node.children.clear()
+                    else:
+                        node.children.pop(key[-1], None)
+                    node.removed = generation
 
     @flexdictargs
     def update(self, conf: dict):
@@ -261,8 +1032,8 @@ class ResConfig(Watchable, IO, CLArgs):
         Args:
             conf: Config to update with.
         """
-        k = "__ROOT__"  # Insert a layer for the first iteration
-        self.__update((k,), {k: self._conf}, {k: conf})
+        self._ensure_loaded()
+        self.__update_root(conf)
 
     @flexdictargs
     def replace(self, conf: dict):
@@ -271,9 +1042,93 @@ class ResConfig(Watchable, IO, CLArgs):
         Args:
             conf: Config for replacement.
         """
-        k = "__ROOT__"  # Insert a layer for the first iteration
-        self.__update((k,), {k: self._conf}, {k: conf}, replace=True)
+        self._ensure_loaded()
+        self.__update_root(conf, replace=True)
+
+    def rollback(self, n: int = 1):
+        """Restore the config as it was before the last ``n`` changes.
+
+        The past configs are kept only when the object is created with ``history``,
+        which bounds their number, e.g., to roll back a bad reload:
+
+        .. code-block:: python
+
+            config = ResConfig(default, config_files=paths, history=10)
+            ...
+            config.load()  # Oops
+            config.rollback()
+
+        The past configs are snapshots (see :meth:`snapshot`) sharing the unchanged
+        nested mappings with one another, so that each costs in proportion to the size
+        of its change. The restored config is applied as an update, and the watch
+        functions are triggered for the keys changed by the rollback. The configs rolled
+        back over are dropped from the history, so that another rollback goes further
+        back.
+
+        Args:
+            n: Number of changes to roll back.
+
+        Raises:
+            IndexError: When the history does not hold ``n`` past configs.
+            RuntimeError: When called within a transaction.
+        """
+        if self._in_transaction:
+            raise RuntimeError("cannot roll back within a transaction")
+        self._ensure_loaded()
+        self.__update_root(None, rollback=n)
+
+    @contextmanager
+    def transaction(self) -> Generator["ResConfig", None, None]:
+        """Batch the updates made within the ``with`` block into one.
+
+        Within the block, :meth:`update`, :meth:`replace`, and the methods using them,
+        e.g., :meth:`load`, stage their changes instead of applying them, and the
+        config read within the block stays unchanged. On leaving the block, the changes
+        from the active config to the staged one are applied at once, so that the watch
+        function for each changed key is triggered only once, with the value before the
+        block as the old value and the final value as the new value:
+
+        .. code-block:: python
+
+            with config.transaction():
+                config.update({"db.host": "remotehost"})
+                config.update({"db.port": 3306})
+
+        If an exception is raised within the block, the staged changes are discarded,
+        as are the layers read by :meth:`load` within it.
+        A transaction entered within another joins the outer one. The updates made by
+        other threads wait until the block is left.
+
+        Yields:
+            This object.
+        """
+        if self._in_transaction:
+            yield self
+            return
+        self._ensure_loaded()
+        local = self._local
+        with self._write_lock:
+            local.in_transaction = True
+            local.staged = None
+            layers = self._layers
+            try:
+                yield self
+                staged = local.staged
+            except BaseException:
+                self._layers = layers  # As replaced by the loads within the block
+                raise
+            finally:
+                local.in_transaction = False
+                local.staged = None
+            # Only the changes are applied, so that the unchanged keys are not visited.
+            pending = (
+                []
+                if staged is None
+                else self.__commit(self.__delta(self._conf, staged))
+            )
+        for func, action, oldval, newval in pending:
+            func(action, oldval, newval)
 
     def reset(self):
         """Reset config to default."""
-        self.replace(deepcopy(extract_values(self._default)))
+        self.replace(deepcopy(extract_values(self._default, self._fields)))
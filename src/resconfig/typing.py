@@ -1,12 +1,15 @@
 from pathlib import Path
 from typing import IO  # noqa
+from typing import TYPE_CHECKING  # noqa
 from typing import Any  # noqa
 from typing import Callable  # noqa
 from typing import Dict  # noqa
 from typing import Generator  # noqa
+from typing import Hashable  # noqa
 from typing import Iterable  # noqa
 from typing import List  # noqa
 from typing import Mapping  # noqa
+from typing import NamedTuple  # noqa
 from typing import NewType  # noqa
 from typing import Optional  # noqa
 from typing import Set  # noqa
@@ -0,0 +1,147 @@
+from collections.abc import Mapping
+
+from .ondict import isdict
+from .ondict import normkey
+from .typing import TYPE_CHECKING
+from .typing import Any
+from .typing import Key
+from .typing import Tuple
+
+if TYPE_CHECKING:
+    from .resconfig import ResConfig
+
+
+class StaleViewError(RuntimeError):
+    """Raised on access to a view after the config has changed."""
+
+
+class ConfigView(Mapping):
+    """Read-only view of the live config.
+
+    The view reads from the config storage directly without copying. Nested mappings
+    are returned as views as well, and leaf values are returned as they are stored;
+    they should not be mutated.
+
+    A view is valid only until the config changes. Once any item of the config has been
+    added, modified, or removed, access to the view, including the nested views
+    obtained from it, raises :class:`StaleViewError`. Obtain a new view to read the
+    updated config.
+
+    Args:
+        config: The :class:`~resconfig.ResConfig` object to view.
+        node: The mapping in the config storage to view.
+        generation: The generation of the config when the view is created.
+    """
+
+    __slots__ = ("_config", "_node", "_generation")
+
+    def __init__(self, config: "ResConfig", node: Mapping, generation: int):
+        self._config = config
+        self._node = node
+        self._generation = generation
+
+    def __repr__(self):
+        return f"ConfigView({self._node!r})"
+
+    def __contains__(self, key):
+        with self._config._lock.read():
+            self._check()
+            return key in self._node
+
+    def __getitem__(self, key):
+        with self._config._lock.read():
+            self._check()
+            return self._wrap(self._node[key])
+
+    def __iter__(self):
+        with self._config._lock.read():
+            self._check()
+            return iter(list(self._node))
+
+    def __len__(self):
+        with self._config._lock.read():
+            self._check()
+            return len(self._node)
+
+    def _check(self):
+        if self._config._generation != self._generation:
+            raise StaleViewError("config has changed since the view was created")
+
+    def _wrap(self, value: Any) -> Any:
+        if isdict(value):
+            return self.__class__(self._config, value, self._generation)
+        return value
+
+    def get(self, key: Key, default: Any = None) -> Any:
+        with self._config._lock.read():
+            self._check()
+            return self._wrap(self._node.get(key, default))
+
+    @property
+    def stale(self) -> bool:
+        """:obj:`True` if the config has changed since the view was created."""
+        return self._config._generation != self._generation
+
+    def asdict(self) -> dict:
+        """Get a built-in dict copy of the viewed config.
+
+        Returns:
+            Built-in :class:`dict` object.
+        """
+        with self._config._lock.read():
+            self._check()
+            return self._node.asdict()
+
+
+class Accessor:
+    """Callable reading the config value at a key.
+
+    The key is parsed once on creation, and the value is looked up once per generation
+    of the config, i.e., only on the first call after the config has changed. Otherwise
+    the call returns the cached value. As with :meth:`~resconfig.ResConfig.get` with
+    ``copy=False``, a mapping is returned as a read-only :class:`ConfigView`, and other
+    values are returned as they are stored; they should not be mutated.
+
+    Args:
+        config: The :class:`~resconfig.ResConfig` object to read from.
+        key: Config key.
+        default: Value returned when the key does not exist.
+    """
+
+    __slots__ = ("_config", "_key", "_default", "_cache")
+
+    def __init__(self, config: "ResConfig", key: Key, default: Any = None):
+        self._config = config
+        self._key = tuple(normkey(key))
+        self._default = default
+        self._cache = (None, None)
+
+    def __repr__(self):
+        return f"Accessor({'.'.join(self._key)!r})"
+
+    def __call__(self) -> Any:
+        generation, value = self._cache
+        if generation != self._config._generation:
+            value = self._resolve()
+        return value
+
+    def _resolve(self) -> Any:
+        config = self._config
+        config._ensure_loaded()
+        with config._lock.read():
+            generation = config._generation
+            try:
+                value = config._conf[self._key]
+            except Exception:
+                value = self._default
+            else:
+                if isdict(value):
+                    value = ConfigView(config, value, generation)
+        # Set the generation and value at once for concurrent readers.
+        self._cache = (generation, value)
+        return value
+
+    @property
+    def key(self) -> Tuple[str, ...]:
+        """The key tuple read by the accessor."""
+        return self._key
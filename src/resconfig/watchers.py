@@ -45,6 +45,14 @@ class Watchers(ONDict):
         ).append(func)
         log.debug("Registered watch function %r for %s", func, key)
 
+    def child(self, key: str) -> Optional["Watchers"]:
+        """Get the watchers nested at the single, non-nested key, if any.
+
+        Unlike the other methods, this does not create the missing nested watchers.
+        """
+        value = dict.get(self, key)
+        return value if isinstance(value, Watchers) else None
+
     def exists(self, key: Key) -> bool:
         """Test if any watch function exists for the key."""
         return key in self and self.__watcher_key in self[key]
@@ -55,6 +63,10 @@ class Watchers(ONDict):
             return self[key].get(self.__watcher_key, [])
         return []
 
+    def local_funcs(self) -> List[WatchFunction]:
+        """Get the list of watch functions registered on these watchers themselves."""
+        return dict.get(self, self.__watcher_key, [])
+
     def trigger(self, key: Key, action: Action, oldval: Any, newval: Any):
         """Trigger the watch functions for the key."""
         for func in self.funcs(key):
@@ -66,20 +78,13 @@ class Watchable:
 
     def deregister(self, key: Key, func: Optional[WatchFunction] = None):
         """Deregister the watch function for the key."""
-        self._watchers.deregister(key, func)
+        with self._lock.write():
+            self._watchers.deregister(key, func)
 
     def register(self, key: Key, func: WatchFunction):
         """Register the watch function for the key."""
-        self._watchers.register(key, func)
-
-    def __reload(self, key, d):
-        _key = key[-1]
-        if not isdict(d[_key]):
-            self._watchers.trigger(key[1:], Action.RELOADED, d[_key], d[_key])
-            return
-        for subkey, v in d[_key].items():
-            self.__reload(key + (subkey,), d[_key])
-        self._watchers.trigger(key[1:], Action.RELOADED, d[_key], d[_key])
+        with self._lock.write():
+            self._watchers.register(key, func)
 
     def reload(self):
         """Trigger all watch functions using the current configuration.
@@ -87,9 +92,32 @@ class Watchable:
         Note that the watch functions for the keys that do not exist in the current
         configuration will not be triggered.
         """
-        # The reason why the recursive visit is on the conf, not the watchers is that we
-        # want to trigger functions in order of configuration.
-        self.__reload(("__ROOT__",), {"__ROOT__": self._conf})
+        # The reason why the visit is on the conf, not the watchers is that we want to
+        # trigger functions in order of configuration. Nested items are visited before
+        # the node holding them. The functions are called after the lock is released,
+        # so that they can read and update the config.
+        self._ensure_loaded()
+        calls = []
+        with self._lock.read():
+            watchers = self._watchers
+            stack = [((), self._conf, iter(self._conf.items()))]
+            while stack:
+                key, value, items = stack[-1]
+                for subkey, subvalue in items:
+                    if isdict(subvalue):
+                        stack.append(
+                            (key + (subkey,), subvalue, iter(subvalue.items()))
+                        )
+                        break
+                    for func in watchers.funcs(key + (subkey,)):
+                        calls.append((func, subvalue))
+                else:
+                    stack.pop()
+                    if key:
+                        for func in watchers.funcs(key):
+                            calls.append((func, value))
+        for func, value in calls:
+            func(Action.RELOADED, value, value)
 
     def watch(self, key: Key) -> WatchFunction:
         """Decorate a function to make it a watch function for the key."""
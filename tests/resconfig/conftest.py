@@ -1,4 +1,6 @@
+import asyncio
 import os
+import sys
 from collections.abc import MutableMapping
 from tempfile import NamedTemporaryFile
 
@@ -55,3 +57,25 @@ def filename():
     filename = f.name
     yield filename
     os.remove(filename)
+
+
+def deep_config(depth, leaf=0):
+    d = leaf
+    for i in range(depth):
+        d = {"k": d, "v": i}
+    return d
+
+
+@pytest.fixture
+def recursion_limit():
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(250)
+    yield sys.getrecursionlimit()
+    sys.setrecursionlimit(limit)
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
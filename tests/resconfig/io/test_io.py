@@ -63,6 +63,12 @@ class Base:
             update.assert_called_with(self.config_path_type(filename))
             assert type(update.call_args[0][0]) is self.config_path_type
 
+    def test_aupdate_from_file(self, filename, run):
+        ResConfig({"a": {"b": "1"}}).save_to_file(filename)
+        conf = ResConfig({"a": {"b": "0"}})
+        run(conf.aupdate_from_file(filename))
+        assert conf["a.b"] == "1"
+
     def test_IO__save(self, filename):
         conf = ResConfig()
         path = self.config_path_type(filename)
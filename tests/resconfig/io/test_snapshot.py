@@ -0,0 +1,136 @@
+import threading
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from resconfig import Action
+from resconfig import ResConfig
+from resconfig.io.snapshot import MAGIC
+from resconfig.io.snapshot import read_snapshot
+from resconfig.io.snapshot import snapshot_version
+from resconfig.io.snapshot import write_snapshot
+
+
+@pytest.fixture
+def filename(tmp_path):
+    yield str(tmp_path / "config.snapshot")
+
+
+class TestSnapshotFile:
+    def test_roundtrip(self, filename):
+        conf = {
+            "a": {"b": 1, "c.d": [1, 2.5, None, True], "e": "\u00e9"},
+            "t": datetime(2020, 1, 1),
+            "u": {"v": datetime(2020, 1, 1, 12, 30, 15, 500, tzinfo=timezone.utc)},
+        }
+        write_snapshot(filename, conf)
+        with open(filename, "rb") as f:
+            assert f.read(len(MAGIC)) == MAGIC
+            assert read_snapshot(f) == conf
+
+    def test_unsupported(self, filename):
+        with pytest.raises(TypeError):
+            write_snapshot(filename, {"a": {1, 2}})
+
+    def test_replaced(self, filename, tmp_path):
+        write_snapshot(filename, {"a": 1})
+        version = snapshot_version(filename)
+        with open(filename, "rb"):
+            write_snapshot(filename, {"a": 2})
+        assert snapshot_version(filename) != version
+        assert [p.name for p in tmp_path.iterdir()] == ["config.snapshot"]
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"",
+            b"RESCONF",
+            b'{"a": {"b": 1}}',
+            MAGIC + b"\0" * 8,
+            MAGIC + b"\2" + b"\0" * 7 + b"\x80\x04",
+            MAGIC + b"\1" + b"\0" * 7 + b"{",
+            MAGIC + b"\2" + b"\0" * 7 + b"[]",
+            b"RESCONF\x01" + b"\2" + b"\0" * 7 + b"{}",
+        ],
+    )
+    def test_invalid(self, filename, content):
+        with open(filename, "wb") as f:
+            f.write(content)
+        with open(filename, "rb") as f:
+            with pytest.raises(ValueError):
+                read_snapshot(f)
+
+
+class TestPublish:
+    default = {"a": {"b": 1, "c": "text"}, "d": 2}
+
+    @pytest.fixture
+    def publisher(self, filename):
+        publisher = ResConfig(self.default)
+        publisher.publish(filename)
+        yield publisher
+
+    @pytest.fixture
+    def worker(self, publisher, filename):
+        worker = ResConfig(self.default, load_on_init=False)
+        worker.attach(filename)
+        yield worker
+
+    def test_attach(self, publisher, worker):
+        assert worker._asdict() == publisher._asdict()
+        assert not worker.sync()
+
+    def test_sync(self, publisher, worker, filename):
+        watched = []
+        worker.register("a.b", lambda *args: watched.append(args))
+        publisher.update({"a.b": 10})
+        publisher.replace({"a": {"b": 10}})
+        publisher.publish(filename)
+        assert worker.sync()
+        assert worker._asdict() == {"a": {"b": 10}}
+        assert watched == [(Action.MODIFIED, 1, 10)]
+        assert not worker.sync()
+
+    def test_concurrent_sync(self, publisher, worker, filename):
+        f = worker._attached[2]
+        publisher.update({"d": 3})
+        publisher.publish(filename)
+        barrier = threading.Barrier(8, timeout=5)
+        results = []
+
+        def sync():
+            barrier.wait()
+            results.append(worker.sync())
+
+        threads = [threading.Thread(target=sync) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(results) == [False] * 7 + [True]
+        assert f.closed and not worker._attached[2].closed
+        assert worker["d"] == 3
+
+    def test_not_attached(self):
+        with pytest.raises(RuntimeError):
+            ResConfig().sync()
+
+    def test_missing(self, tmp_path):
+        conf = ResConfig()
+        with pytest.raises(FileNotFoundError):
+            conf.attach(str(tmp_path / "missing"))
+        with pytest.raises(RuntimeError):
+            conf.sync()
+
+    def test_reattach(self, publisher, worker, filename, tmp_path):
+        f = worker._attached[2]
+        with pytest.raises(FileNotFoundError):
+            worker.attach(str(tmp_path / "missing"))
+        assert worker._attached[2] is f and not f.closed
+        other = str(tmp_path / "other.snapshot")
+        publisher.update({"d": 3})
+        publisher.publish(other)
+        worker.attach(other)
+        assert f.closed
+        assert worker["d"] == 3
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from resconfig.aio import Coalescer
+
+
+async def gather(*aws, **kwargs):
+    return await asyncio.gather(*aws, **kwargs)
+
+
+class TestCoalescer:
+    @pytest.fixture
+    def calls(self):
+        yield []
+
+    @pytest.fixture
+    def func(self, calls):
+        async def func(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        yield func
+
+    def test_call(self, run, func, calls):
+        coalescer = Coalescer()
+        assert run(coalescer("key", func, 1)) == 1
+        assert run(coalescer("key", func, 2)) == 2
+        assert calls == [1, 2]
+        assert not coalescer._running and not coalescer._queued
+
+    def test_coalesced(self, run, func, calls):
+        coalescer = Coalescer()
+        results = run(gather(*[coalescer("key", func, i) for i in range(5)]))
+        assert results == [1, 2, 2, 2, 2]
+        assert calls == [0, 1]
+
+    def test_keys(self, run, func, calls):
+        coalescer = Coalescer()
+        results = run(gather(coalescer("a", func, 0), coalescer("b", func, 1)))
+        assert sorted(results) == [2, 2]
+        assert calls == [0, 1]
+
+    def test_error(self, run, calls):
+        async def func():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            raise ValueError(len(calls))
+
+        coalescer = Coalescer()
+        results = run(
+            gather(*[coalescer("key", func) for _ in range(3)], return_exceptions=True)
+        )
+        assert [e.args for e in results] == [(1,), (2,), (2,)]
+        with pytest.raises(ValueError):
+            run(coalescer("key", func))
+        assert len(calls) == 3
+
+    def test_cancelled(self, run, func, calls):
+        coalescer = Coalescer()
+
+        async def main():
+            first = asyncio.ensure_future(coalescer("key", func, 0))
+            second = asyncio.ensure_future(coalescer("key", func, 1))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert run(main()) == 2
+        assert calls == [0, 1]
@@ -5,6 +5,7 @@ import pytest
 
 from resconfig.fields import Bool
 from resconfig.fields import Datetime
+from resconfig.fields import FieldTable
 from resconfig.fields import Float
 from resconfig.fields import Int
 from resconfig.fields import NullableBool
@@ -13,6 +14,8 @@ from resconfig.fields import NullableFloat
 from resconfig.fields import NullableInt
 from resconfig.fields import NullableStr
 from resconfig.fields import Str
+from resconfig.fields import extract_values
+from resconfig.ondict import ONDict
 
 
 class Base:
@@ -35,6 +38,28 @@ class TestBool(Base):
     field_type = Bool
     to_str_expected = "false"
 
+    @pytest.mark.parametrize(
+        "obj, expected",
+        [
+            (True, True),
+            (0, False),
+            ("true", True),
+            ("FALSE", False),
+            ("1", True),
+            ("0", False),
+            ("Yes", True),
+            ("no", False),
+            ("ON", True),
+            ("off", False),
+        ],
+    )
+    def test_from_obj(self, field, obj, expected):
+        assert field.from_obj(obj) is expected
+
+    def test_from_obj_invalid(self, field):
+        with pytest.raises(ValueError):
+            field.from_obj("maybe")
+
 
 class TestDatetime(Base):
     field_type = Datetime
@@ -146,3 +171,25 @@ class TestNullableStr(BaseNullable):
     field_type = NullableStr
     from_obj_expected = ""
     to_str_expected = ""
+
+
+class TestFieldTable:
+    schema = ONDict({"a": {"b": Int(1), r"c\.d": Str("x"), "e": 2}, "f": Bool()})
+
+    def test_compile(self):
+        table = FieldTable.compile(self.schema)
+        assert table == {
+            ("a", "b"): self.schema["a.b"],
+            ("a", r"c\.d"): self.schema[("a", r"c\.d")],
+            ("f",): self.schema["f"],
+        }
+        assert FieldTable.compile(table) is table
+
+    def test_compile_empty(self):
+        assert FieldTable.compile(None) == {}
+
+    def test_extract_values(self):
+        expected = {"a": {"b": 1, r"c\.d": "x", "e": 2}, "f": False}
+        assert extract_values(self.schema) == expected
+        table = FieldTable.compile(self.schema)
+        assert extract_values(self.schema, table) == expected
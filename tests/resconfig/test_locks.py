@@ -0,0 +1,88 @@
+import threading
+import time
+
+from resconfig.locks import NullLock
+from resconfig.locks import RWLock
+
+
+class TestRWLock:
+    def test_readers(self):
+        lock = RWLock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def read():
+            with lock.read():
+                barrier.wait()  # Times out unless all readers hold the lock at once
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        for t in threads:
+            t.join()
+
+    def test_writer_exclusive(self):
+        lock = RWLock()
+        events = []
+
+        def write(i):
+            with lock.write():
+                events.append(("enter", i))
+                time.sleep(0.01)
+                events.append(("exit", i))
+
+        def read(i):
+            with lock.read():
+                events.append(("read", i))
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(3)]
+        threads += [threading.Thread(target=read, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        writing = None
+        for event, i in events:
+            if event == "enter":
+                assert writing is None
+                writing = i
+            elif event == "exit":
+                assert writing == i
+                writing = None
+            else:
+                assert writing is None
+
+    def test_writer_preferred(self):
+        lock = RWLock()
+        events = []
+        lock.acquire_read()
+
+        def write():
+            with lock.write():
+                events.append("write")
+
+        def read():
+            with lock.read():
+                events.append("read")
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not lock._waiting:
+            time.sleep(0.001)
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.01)
+        assert not events
+        lock.release_read()
+        writer.join()
+        reader.join()
+        assert events == ["write", "read"]
+
+
+class TestNullLock:
+    def test(self):
+        lock = NullLock()
+        with lock.read():
+            with lock.write():
+                pass
@@ -1,36 +1,161 @@
+import pickle
+import random
+from collections import OrderedDict
 from copy import deepcopy
 
 import pytest
 
+from resconfig.actions import Action
+from resconfig.ondict import DictONDict
+from resconfig.ondict import FrozenONDict
+from resconfig.ondict import IndexedONDict
 from resconfig.ondict import ONDict
+from resconfig.ondict import diff
+from resconfig.ondict import equal
+from resconfig.ondict import freeze
+from resconfig.ondict import keycache_clear
+from resconfig.ondict import keycache_info
 from resconfig.ondict import merge
 from resconfig.ondict import normalize
 from resconfig.ondict import normkey
 
+from .conftest import deep_config
+
 
 class TestONDict:
+    cls = ONDict
     default = {"foo": {"bar": {"baz": 0}, "qux": "quux"}}
 
     @pytest.fixture
     def d(self):
-        yield ONDict(deepcopy(self.default))
+        yield self.cls(deepcopy(self.default))
 
     def test_init_default(self):
-        d = ONDict()
+        d = self.cls()
         assert d == {}
 
     def test_init_mapping(self):
-        d = ONDict(self.default)
+        d = self.cls(self.default)
         assert d == self.default
 
     def test_init_iterable(self):
-        d = ONDict(((k, v) for k, v in self.default.items()))
+        d = self.cls(((k, v) for k, v in self.default.items()))
         assert d == self.default
 
     def test_init_kwargs(self):
-        d = ONDict(**self.default)
+        d = self.cls(**self.default)
         assert d == self.default
 
+    @pytest.mark.parametrize(
+        "trial",
+        [
+            {},
+            {"a": 1, "b": {"c": 2, "d.e": 3}},
+            {"a.b": 1, "a": {"c": 2}, "a.d": {"e.f": 3}},
+            {"a": 1, "a.b": 2},
+            {"a.b": 1, "a": 2, "c": {}},
+            {("a", "b"): 1, "a": {"b": {"c": 2}}},
+            {"x": {"a": 1}, "x.a": {"b": 2}},
+            {"x": {"a": 1}, ("x", "a", "b"): 2},
+        ],
+    )
+    def test_from_mapping(self, trial):
+        expected = self.cls()
+        expected.merge(trial)
+        d = self.cls.from_mapping(trial)
+        assert type(d) is self.cls
+        assert d == expected
+        assert list(d.allkeys()) == list(expected.allkeys())
+        assert all(type(d[k[:-1]]) is self.cls for k in d.allkeys() if len(k) > 1)
+
+    def test_from_mapping_no_alias(self):
+        trial = {"a": {"b": [1]}}
+        d = self.cls.from_mapping(trial)
+        assert d["a"] is not trial["a"]
+        assert d["a.b"] is trial["a"]["b"]
+
+    def test_from_mapping_trusted(self):
+        d = self.cls.from_mapping({"a.b": 1, "c": {"d.e": 2}}, trusted=True)
+        assert d == {"a.b": 1, "c": {"d.e": 2}}
+        assert d[("c", "d.e")] == 2
+
+    def test_from_items(self):
+        items = [("a.b", 1), ("a", {"c": 2}), ("d", 3), ("a.b", 4), ("d.e", 5)]
+        d = self.cls.from_items(iter(items))
+        assert d == {"a": {"b": 4, "c": 2}, "d": {"e": 5}}
+        assert list(d.allkeys(as_str=True)) == ["a.b", "a.c", "d.e"]
+
+    def test_fromkeys_many(self):
+        keys = [f"k{i % 10}.k{i % 7}.k{i}" for i in range(1000)]
+        d = self.cls.fromkeys(keys, 0)
+        assert len(list(d.allkeys())) == 1000
+        assert all(d[k] == 0 for k in keys)
+
+    def test_from_items_overwrite(self):
+        items = [("x", {"a": 1}), ("x", {"a.b": 2})]
+        expected = {"x": {"a": {"b": 2}}}
+        assert self.cls(items) == expected
+        assert self.cls.from_items(items) == expected
+        assert self.cls({"x": {"a": 1}}, x={"a.b": 2}) == expected
+
+    @pytest.mark.parametrize(
+        "items, exc",
+        [([("a", 1, 2)], ValueError), ([("a", 1), 5], TypeError)],
+    )
+    def test_invalid_items(self, items, exc):
+        with pytest.raises(exc) as e:
+            self.cls(items)
+        assert "sequence element #" in str(e.value)
+
+    def test_from_mapping_inconsistent(self):
+        with pytest.raises(TypeError) as exc:
+            self.cls.from_mapping({"x": {"a": {"b": 1, "b.c": 2}}})
+        assert "'x.a.b'" in str(exc.value)
+
+    @pytest.mark.parametrize(
+        "d, expected",
+        [
+            ({"x": {"a.b": 1, "a": {"b.c": 2}}}, {"x": {"a": {"b": {"c": 2}}}}),
+            ({"x": {"a.b": 1, "a": ""}}, {"x": {"a": {"b": 1}}}),
+            ({"a": {"b": 1}, "a.b.c": 2}, {"a": {"b": {"c": 2}}}),
+            ({"x": {"a.b.c": 0, "a": 0, "b.c.d": {"c": 3}}}, TypeError),
+        ],
+    )
+    def test_nested_keys_in_values(self, d, expected):
+        if expected is TypeError:
+            with pytest.raises(TypeError):
+                self.cls(d)
+        else:
+            assert self.cls(d) == expected
+
+    def test_same_as_normalize(self):
+        # Compare with merging the normalized items, over random nested inputs.
+        rnd = random.Random(0)
+
+        def key():
+            return ".".join(rnd.choice("abc") for _ in range(rnd.randint(1, 3)))
+
+        def value(depth):
+            if depth < 3 and rnd.random() < 0.4:
+                return {key(): value(depth + 1) for _ in range(rnd.randint(0, 4))}
+            return rnd.choice([0, 1, "", "s", None, []])
+
+        def build(make, d):
+            try:
+                return make(d).asdict()
+            except (TypeError, IndexError) as exc:
+                return type(exc)
+
+        def reference(d):
+            new = self.cls()
+            for k, v in d.items():
+                merge(new, normalize({k: v}, cls=self.cls))
+            return new
+
+        for _ in range(3000):
+            d = {key(): value(0) for _ in range(rnd.randint(1, 4))}
+            assert build(self.cls, d) == build(reference, d), d
+
     @pytest.mark.parametrize(
         "key, expected",
         [
@@ -75,7 +200,7 @@ class TestONDict:
 
     def test_getitem_nested_value_type(self, d):
         t = d["foo"]
-        assert type(t) == ONDict
+        assert type(t) == self.cls
 
     def test_getitem_nested_value_identity(self, d):
         t = d["foo"]
@@ -118,7 +243,7 @@ class TestONDict:
 
     def test_get_nested_value_type(self, d):
         t = d.get("foo")
-        assert type(t) == ONDict
+        assert type(t) == self.cls
 
     def test_get_nested_value_identity(self, d):
         t = d.get("foo")
@@ -229,10 +354,10 @@ class TestONDict:
         assert list(d.allkeys(as_str=True)) == ["foo.bar.baz", "foo.qux"]
 
     def test_asdict(self):
-        d = ONDict({"a.b.c": 0})
-        assert type(d) == ONDict
-        assert type(d["a"]) == ONDict
-        assert type(d["a.b"]) == ONDict
+        d = self.cls({"a.b.c": 0})
+        assert type(d) == self.cls
+        assert type(d["a"]) == self.cls
+        assert type(d["a.b"]) == self.cls
         assert type(d["a.b.c"]) == int
         d = d.asdict()
         assert type(d) == dict
@@ -272,6 +397,390 @@ class TestONDict:
         assert d == expected
 
 
+class TestDictONDict(TestONDict):
+    cls = DictONDict
+
+    def test_type(self, d):
+        assert type(d) is DictONDict
+        assert not isinstance(d, OrderedDict)
+        assert type(d["foo"]) is DictONDict
+        assert not hasattr(d, "__dict__")
+
+
+class TestIndexedONDict(TestONDict):
+    cls = IndexedONDict
+
+    @staticmethod
+    def assert_index(d):
+        expected = {}
+        stack = [(d, ())]
+        while stack:
+            node, prefix = stack.pop()
+            for k, v in node.items():
+                expected[prefix + (k,)] = v
+                if isinstance(v, dict):
+                    assert isinstance(v, IndexedONDict)
+                    assert v._index is d._index
+                    assert v._prefix == prefix + (k,)
+                    stack.append((v, prefix + (k,)))
+        assert d._index == expected
+
+    @pytest.fixture
+    def d(self):
+        d = IndexedONDict(deepcopy(self.default))
+        yield d
+        self.assert_index(d)
+
+    def test_from_mapping_index(self):
+        d = IndexedONDict.from_mapping({"a.b": {"c": 1}, "a": {"b": 2}, "d": 3})
+        self.assert_index(d)
+        assert d["a.b"] == 2
+
+    def test_allkeys_cached(self, d):
+        assert list(d.allkeys()) == list(d.allkeys())
+        assert ("foo", "bar", "baz") in d._keycache[(), False]
+        assert list(d["foo"].allkeys(as_str=True)) == ["bar.baz", "qux"]
+
+    @pytest.mark.parametrize(
+        "mutate, expected",
+        [
+            (
+                lambda d: d["foo.bar"].update(x=1),
+                ["foo.bar.baz", "foo.bar.x", "foo.qux"],
+            ),
+            (lambda d: d["foo"].pop("bar"), ["foo.qux"]),
+            (lambda d: d["foo"].move_to_end("bar"), ["foo.qux", "foo.bar.baz"]),
+            (
+                lambda d: d.__setitem__("foo.qux", {"a": 1}),
+                ["foo.bar.baz", "foo.qux.a"],
+            ),
+            (
+                lambda d: d.__setitem__("x", IndexedONDict(y=1)),
+                ["foo.bar.baz", "foo.qux", "x.y"],
+            ),
+        ],
+    )
+    def test_allkeys_invalidated(self, d, mutate, expected):
+        list(d.allkeys())
+        list(d["foo"].allkeys())
+        mutate(d)
+        assert list(d.allkeys(as_str=True)) == expected
+        assert list(d["foo"].allkeys()) == [k[1:] for k in d.allkeys() if k[0] == "foo"]
+
+    def test_allkeys_detached(self, d):
+        foo = d["foo"]
+        list(d.allkeys())
+        list(foo.allkeys())
+        del d["foo"]
+        foo["bar.x"] = 1
+        assert list(foo.allkeys(as_str=True)) == ["bar.baz", "bar.x", "qux"]
+        assert list(d.allkeys()) == []
+
+    def test_index(self, d):
+        assert d._index[("foo", "bar", "baz")] == 0
+        assert d._index[("foo", "bar")] is d["foo.bar"]
+
+    def test_nested_mutation(self, d):
+        ref = d["foo.bar"]
+        ref["qux"] = {"quux": 1}
+        assert d["foo.bar.qux.quux"] == 1
+        del ref["baz"]
+        assert "foo.bar.baz" not in d
+
+    def test_assign_plain_mapping(self, d):
+        d["foo.bar"] = {"a": {"b": 1}}
+        assert type(d["foo.bar.a"]) is IndexedONDict
+        assert d["foo.bar.a.b"] == 1
+
+    def test_assign_attached_subtree(self, d):
+        d["baz"] = d["foo.bar"]
+        assert d["baz"] == d["foo.bar"]
+        assert d["baz"] is not d["foo.bar"]
+
+    def test_popped_subtree_is_detached(self, d):
+        popped = d.pop("foo")
+        self.assert_index(popped)
+        assert popped["bar.baz"] == 0
+        assert "foo.bar.baz" not in d
+
+    def test_merge(self, d):
+        d.merge({"foo.bar": {"qux": 1}, "x.y": 2})
+        assert d["foo.bar.qux"] == 1
+        assert d["x.y"] == 2
+
+    def test_clear(self, d):
+        d["foo"].clear()
+        assert "foo.bar" not in d
+
+    def test_popitem(self, d):
+        assert d["foo"].popitem() == ("qux", "quux")
+        assert "foo.qux" not in d
+
+    def test_deepcopy(self, d):
+        copied = deepcopy(d)
+        self.assert_index(copied)
+        assert copied == d
+        assert copied["foo.bar"] is not d["foo.bar"]
+
+    def test_pickle(self, d):
+        loaded = pickle.loads(pickle.dumps(d))
+        self.assert_index(loaded)
+        assert loaded == d
+
+
+class TestFrozenONDict:
+    default = {"foo": {"bar": {"baz": 0}, "qux": "quux"}, "x": {"y": 1}}
+
+    @pytest.fixture
+    def d(self):
+        yield FrozenONDict(self.default)
+
+    def test_init(self, d):
+        assert d == self.default
+        assert type(d["foo"]) is FrozenONDict
+        assert FrozenONDict({"foo.bar.baz": 0}) == {"foo": {"bar": {"baz": 0}}}
+        assert FrozenONDict(foo=1) == {"foo": 1}
+
+    @pytest.mark.parametrize(
+        "key, expected",
+        [
+            ("foo", True),
+            ("foo.bar.baz", True),
+            (("foo", "bar", "baz"), True),
+            ("foo.bar.baz.qux", False),
+            ("foo.baz", False),
+            ("bar", False),
+        ],
+    )
+    def test_contains(self, d, key, expected):
+        assert (key in d) is expected
+
+    @pytest.mark.parametrize(
+        "key, expected", [("foo.baz", KeyError), ("foo.qux.bar", TypeError)]
+    )
+    def test_getitem_error(self, d, key, expected):
+        with pytest.raises(expected):
+            d[key]
+
+    def test_get(self, d):
+        assert d.get("foo.bar.baz") == 0
+        assert d.get("foo.bar.qux", "default") == "default"
+
+    def test_immutable(self, d):
+        with pytest.raises(TypeError):
+            d["foo"] = 1
+        with pytest.raises(TypeError):
+            del d["foo"]
+
+    def test_set(self, d):
+        new = d.set("foo.bar.baz", 1)
+        assert new["foo.bar.baz"] == 1
+        assert d["foo.bar.baz"] == 0
+        assert new["x"] is d["x"]
+        assert new.set("x.y.z", {"a": 1})["x.y.z.a"] == 1
+
+    def test_delete(self, d):
+        new = d.delete("foo.bar")
+        assert new == {"foo": {"qux": "quux"}, "x": {"y": 1}}
+        assert "foo.bar" in d
+        assert new["x"] is d["x"]
+        with pytest.raises(KeyError):
+            d.delete("foo.baz")
+
+    def test_refresh(self, d):
+        conf = d.thaw()
+        conf["foo.bar.baz"] = 1
+        conf["foo.new"] = {"a": 1}
+        del conf["foo.qux"]
+        new = d.refresh(conf, [("foo", "bar", "baz"), ("foo", "new"), ("foo", "qux")])
+        assert new == conf
+        assert list(new["foo"]) == list(conf["foo"])
+        assert new["x"] is d["x"]
+
+    def test_thaw(self, d):
+        conf = d.thaw()
+        assert type(conf) is ONDict
+        assert type(conf["foo"]) is ONDict
+        assert conf == d
+        conf = d.thaw(IndexedONDict)
+        assert conf["foo.bar.baz"] == 0
+
+    def test_allkeys(self, d):
+        assert list(d.allkeys(as_str=True)) == ["foo.bar.baz", "foo.qux", "x.y"]
+
+    def test_asdict(self, d):
+        assert type(d.asdict()["foo"]) is dict
+
+    def test_freeze(self):
+        assert freeze(1) == 1
+        d = FrozenONDict({"a": 1})
+        assert freeze(d) is d
+
+
+class TestFingerprint:
+    default = TestFrozenONDict.default
+
+    @pytest.fixture
+    def d(self):
+        yield FrozenONDict(self.default)
+
+    def test_content(self, d):
+        assert d.fingerprint() == FrozenONDict(deepcopy(self.default)).fingerprint()
+        assert (
+            d.fingerprint() == FrozenONDict({"x.y": 1, "foo": d["foo"]}).fingerprint()
+        )
+        assert d.fingerprint() != d.set("x.y", 2).fingerprint()
+        assert d.fingerprint() != d.set("x.y", "1").fingerprint()
+        assert d.fingerprint() != d.set("x", {"y": {}}).fingerprint()
+        assert d.fingerprint() != d.delete("foo.qux").fingerprint()
+
+    def test_stable(self):
+        assert FrozenONDict({"a": {"b": 1}}).fingerprint() == (
+            "2c736d47e5e8f076e39d0e9749a07846"
+        )
+
+    def test_cached(self, d):
+        d.fingerprint()
+        new = d.set("foo.bar.baz", 1)
+        assert new["foo.bar"]._digest is None
+        assert new["foo.qux"] == d["foo.qux"]
+        new.fingerprint()
+        assert new["x"]._digest is d["x"]._digest
+
+    def test_diff(self, d):
+        a = d.set("x.y", 2)
+        b = FrozenONDict(a.asdict())
+        a.fingerprint()
+        b.fingerprint()
+        a["foo"]._data["qux"] = "changed"  # Only possible by poking at the internals
+        assert diff(a, b) == []
+        assert equal(a, b)
+
+    def test_deep(self, recursion_limit):
+        depth = recursion_limit + 50
+        d = FrozenONDict(deep_config(depth))
+        assert d.fingerprint() != d.set(("k",) * depth, 1).fingerprint()
+
+
+class TestDeepTree:
+    @pytest.fixture
+    def depth(self, recursion_limit):
+        yield recursion_limit + 50
+
+    def test_init(self, depth):
+        d = ONDict(deep_config(depth))
+        assert d[("k",) * depth] == 0
+
+    def test_allkeys(self, depth):
+        d = ONDict(deep_config(depth))
+        keys = list(d.allkeys())
+        assert len(keys) == depth + 1
+        assert keys[0] == ("k",) * depth
+        assert keys[-1] == ("v",)
+
+    def test_asdict(self, depth):
+        d = ONDict(deep_config(depth)).asdict()
+        assert type(d) is dict
+        assert type(d["k"]["k"]) is dict
+
+    def test_deepcopy(self, depth):
+        d = ONDict(deep_config(depth))
+        copied = deepcopy(d)
+        assert equal(copied, d)
+        assert copied["k.k"] is not d["k.k"]
+
+    def test_merge(self, depth):
+        d = merge(ONDict(deep_config(depth)), ONDict(deep_config(depth, leaf=1)))
+        assert d[("k",) * depth] == 1
+
+    def test_equal(self, depth):
+        assert equal(deep_config(depth), deep_config(depth))
+        assert not equal(deep_config(depth), deep_config(depth, leaf=1))
+
+
+class TestEqual:
+    @pytest.mark.parametrize(
+        "a, b, expected",
+        [
+            (1, 1, True),
+            (1, 2, False),
+            ({"a": 1}, 1, False),
+            ({"a": {"b": 1}}, {"a": {"b": 1}}, True),
+            ({"a": {"b": 1}}, {"a": {"b": 2}}, False),
+            ({"a": {"b": 1}}, {"a": {"c": 1}}, False),
+            ({"a": 1, "b": 2}, {"b": 2, "a": 1}, True),
+            (ONDict({"a": 1, "b": 2}), ONDict({"b": 2, "a": 1}), False),
+            (ONDict({"a": 1, "b": 2}), {"b": 2, "a": 1}, True),
+        ],
+    )
+    def test(self, a, b, expected):
+        assert equal(a, b) is expected
+        assert (a == b) is expected
+
+
+class TestDiff:
+    a = {"a": 1, "b": {"c": 2, "d": {"e": 3}}, "f": [4], "g": {"h": 5}}
+
+    @pytest.mark.parametrize(
+        "b, expected",
+        [
+            (a, []),
+            (
+                {"a": 1, "b": {"c": 2, "d": {"e": 3}}, "f": [4], "g": {"h": 5}, "i": 6},
+                [(Action.ADDED, ("i",), None, 6)],
+            ),
+            (
+                {"a": 0, "b": {"c": 2, "d": 3}, "f": [4, 5], "g": {"h": 5}},
+                [
+                    (Action.MODIFIED, ("a",), 1, 0),
+                    (Action.MODIFIED, ("b", "d"), {"e": 3}, 3),
+                    (Action.MODIFIED, ("f",), [4], [4, 5]),
+                ],
+            ),
+            (
+                {"b": {"c": 2, "d": {"x": {"y": 1}}}, "f": [4], "g": {"h": 5}},
+                [
+                    (Action.ADDED, ("b", "d", "x"), None, {"y": 1}),
+                    (Action.REMOVED, ("b", "d", "e"), 3, None),
+                    (Action.REMOVED, ("a",), 1, None),
+                ],
+            ),
+            ({}, [(Action.REMOVED, (k,), v, None) for k, v in a.items()]),
+        ],
+    )
+    def test(self, b, expected):
+        assert diff(self.a, b) == expected
+
+    def test_partial(self):
+        b = {"b": {"d": {"e": 0}}, "x": 1}
+        assert diff(self.a, b, partial=True) == [
+            (Action.MODIFIED, ("b", "d", "e"), 3, 0),
+            (Action.ADDED, ("x",), None, 1),
+        ]
+
+    def test_references(self):
+        b = deepcopy(self.a)
+        b["b"]["d"] = {"e": 4}
+        b["g"] = 0
+        changes = diff(self.a, b)
+        assert changes[0].old is self.a["b"]["d"]["e"]
+        assert changes[1].old is self.a["g"]
+        assert changes[1].key == ("g",)
+
+    def test_types(self):
+        a = ONDict(self.a)
+        b = freeze(self.a).set("b.d.e", 0)
+        assert diff(a, b) == [(Action.MODIFIED, ("b", "d", "e"), 3, 0)]
+        assert diff(b, a) == [(Action.MODIFIED, ("b", "d", "e"), 0, 3)]
+
+    def test_deep(self, recursion_limit):
+        depth = recursion_limit + 50
+        key = ("k",) * depth
+        assert diff(deep_config(depth), deep_config(depth, leaf=1)) == [
+            (Action.MODIFIED, key, 0, 1)
+        ]
+
+
 class TestMerge:
     @pytest.mark.parametrize(
         "d1, d2, expected",
@@ -330,3 +839,34 @@ class TestNormkey:
     def test_error(self, key, expected):
         with pytest.raises(expected):
             list(normkey(key))
+
+
+class TestKeyCache:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        keycache_clear()
+        yield
+        keycache_clear()
+
+    def test_hits_and_misses(self):
+        d = ONDict({"a": {"b": {"c": 1}}})
+        keycache_clear()
+        assert d["a.b.c"] == 1
+        info = keycache_info()
+        assert info.misses > 0
+        for _ in range(3):
+            assert d["a.b.c"] == 1
+            assert "a.b.c" in d
+            assert d.get("a.b.c") == 1
+        assert keycache_info().misses == info.misses
+        assert keycache_info().hits > info.hits
+
+    def test_escaped_key(self):
+        assert list(normkey(r"a.foo\.bar.b")) == ["a", r"foo\.bar", "b"]
+        assert list(normkey(r"a.foo\.bar.b")) == ["a", r"foo\.bar", "b"]
+        assert keycache_info().hits == 1
+
+    def test_bounded(self):
+        for i in range(keycache_info().maxsize + 10):
+            list(normkey(f"a.{i}"))
+        assert keycache_info().currsize == keycache_info().maxsize
@@ -1,9 +1,29 @@
+import asyncio
 import os
+import threading
+import time
 from argparse import Namespace
+from contextlib import suppress
+from copy import deepcopy
+from datetime import datetime
+from datetime import timezone
+from unittest import mock
 
 import pytest
 
+from resconfig.actions import Action
+from resconfig.fields import Bool
+from resconfig.fields import Int
+from resconfig.fields import Str
+from resconfig.ondict import DictONDict
+from resconfig.ondict import FrozenONDict
+from resconfig.ondict import IndexedONDict
+from resconfig.ondict import ONDict
+from resconfig.resconfig import Flag
 from resconfig.resconfig import ResConfig
+from resconfig.views import ConfigView
+
+from .conftest import deep_config
 
 
 class TestCase:
@@ -106,6 +126,13 @@ class TestPrepareConfig:
         assert result["foo.bar.baz"] == env[envvar_prefix + "FOO_BAR_BAZ"]
         assert result[r"foo.ba\.r.baz"] == env[envvar_prefix + "FOO_BA_R_BAZ"]
 
+    def test_env_unmatched(self, monkeypatch):
+        monkeypatch.setenv("FOO_BAR_BAZ", "bar")
+        monkeypatch.setenv("RC_FOO_BAR", "bar")
+        rc = ResConfig(self.default, envvar_prefix="RC_")
+        assert rc._envkeys["RC_FOO_BAR_BAZ"] == [("foo", "bar", "baz")]
+        assert rc._prepare_config() == rc._default
+
     def test_clargs(self):
         args = Namespace()
         args.__dict__ = {"foo_bar_baz": 55, "foo_ba.r_baz": "bar"}
@@ -127,6 +154,120 @@ class TestPrepareConfig:
         assert result[r"foo.ba\.r.baz"] == "from_clarg"
 
 
+class TestFields(TestCase):
+    @pytest.fixture
+    def conf(self):
+        yield ResConfig({"a": {"int": Int(1), "str": Str("x")}, "b": 2})
+
+    def test_default(self, conf):
+        assert conf._asdict() == {"a": {"int": 1, "str": "x"}, "b": 2}
+
+    def test_update(self, conf):
+        conf.update({"a.int": "10", "a.str": 20, "b": "30"})
+        assert conf._asdict() == {"a": {"int": 10, "str": "20"}, "b": "30"}
+
+    def test_remove(self, conf):
+        conf.update({"a.int": Flag.REMOVE})
+        assert "a.int" not in conf
+
+    def test_env(self, monkeypatch):
+        monkeypatch.setenv("A_INT", "10")
+        conf = ResConfig({"a": {"int": Int(1)}})
+        assert conf["a.int"] == 10
+
+    @pytest.mark.parametrize("value, expected", [("1", True), ("off", False)])
+    def test_env_bool(self, monkeypatch, value, expected):
+        monkeypatch.setenv("DEBUG", value)
+        conf = ResConfig({"debug": Bool(not expected)})
+        assert conf["debug"] is expected
+
+
+class TestLayers(TestCase):
+    @pytest.fixture
+    def files(self, tmp_path):
+        files = [str(tmp_path / "conf1.json"), str(tmp_path / "conf2.json")]
+        ResConfig({"x1": 10, "x3": {"y1": 20}}).save_to_file(files[1])
+        yield files
+
+    @pytest.fixture
+    def conf(self, files):
+        conf = ResConfig(self.default, config_files=files)
+        conf.called = []
+        for key in ("x1", "x3.y1", "x4.y1"):
+            conf.register(key, lambda *args: conf.called.append(args))
+        yield conf
+
+    def test_layers(self, conf, files):
+        assert conf.layers == ("default", files[1], files[0], "env", "clargs")
+
+    def test_load_file(self, conf, files):
+        ResConfig({"x1": 10, "x3": {"y1": 30}, "x5": 1}).save_to_file(files[0])
+        with mock.patch.object(ResConfig, "_ResConfig__read_default") as read:
+            conf.load_layer(files[0])
+        read.assert_not_called()
+        assert conf.called == [(Action.MODIFIED, 20, 30)]
+        assert conf._asdict() == ResConfig(self.default, config_files=files)._asdict()
+
+    def test_load_removed(self, conf, files):
+        os.remove(files[1])
+        conf.load_layer(files[1])
+        assert conf.called == [
+            (Action.MODIFIED, 10, self.default["x1"]),
+            (Action.MODIFIED, 20, self.default["x3"]["y1"]),
+        ]
+        assert conf._asdict() == self.default
+
+    def test_load_env(self, conf, monkeypatch):
+        monkeypatch.setenv("X4_Y1", "50")
+        conf.load_layer("env")
+        assert conf.called == [(Action.MODIFIED, self.default["x4"]["y1"], "50")]
+        monkeypatch.delenv("X4_Y1")
+        conf.load_layer("env")
+        assert conf["x4.y1"] == self.default["x4"]["y1"]
+
+    def test_load_clargs(self, conf):
+        args = Namespace()
+        args.__dict__ = {"x1": 30}
+        conf.prepare_from_argparse(args)
+        conf.load_layer("clargs")
+        assert conf.called == [(Action.MODIFIED, 10, 30)]
+
+    def test_no_merge(self, files):
+        conf = ResConfig(self.default, config_files=files, merge_config_files=False)
+        ResConfig({"x1": 30}).save_to_file(files[0])
+        conf.load_layer(files[0])
+        assert conf["x1"] == 30
+        assert conf["x3.y1"] == self.default["x3"]["y1"]
+
+    def test_unknown(self, conf):
+        with pytest.raises(KeyError):
+            conf.load_layer("unknown")
+
+    @pytest.mark.parametrize("concurrency", [None, "copy-on-write", "lock"])
+    def test_skip_sections(self, files, concurrency):
+        conf = ResConfig(self.default, config_files=files, concurrency=concurrency)
+        conf.load()
+        ResConfig({"x1": 30}).save_to_file(files[0])
+        enter = ResConfig._ResConfig__enter_node
+        entered = []
+
+        def spy(self, key, *args):
+            entered.append(key)
+            return enter(self, key, *args)
+
+        with mock.patch.object(ResConfig, "_ResConfig__enter_node", spy):
+            conf.load_layer(files[0])
+        assert entered == [()]
+        assert conf["x1"] == 30
+
+    def test_read_named_file(self, conf, files):
+        with mock.patch.object(ResConfig, "_ResConfig__read_file") as read:
+            read.return_value = ONDict({"x1": 30})
+            conf.load_layer(files[1])
+        read.assert_called_once()
+        assert conf["x1"] == 30
+
+
 class TestIndexAccess(TestCase):
     def test(self):
         conf = ResConfig(self.default)
@@ -151,6 +292,85 @@ class TestGet(TestCase):
         conf = ResConfig(self.default)
         assert conf.get("non") is None
 
+    def test_copy(self):
+        conf = ResConfig(self.default)
+        value = conf.get("x3")
+        assert value == self.default["x3"]
+        assert value is not conf._conf["x3"]
+
+    def test_no_copy(self):
+        conf = ResConfig(self.default)
+        assert conf.get("x3.y1", copy=False) == self.default["x3"]["y1"]
+        value = conf.get("x3", copy=False)
+        assert isinstance(value, ConfigView)
+        assert value == self.default["x3"]
+        assert conf.get("non", "default", copy=False) == "default"
+
+
+class TestTypedGet(TestCase):
+    @pytest.fixture
+    def conf(self):
+        yield ResConfig(
+            {
+                "bool": True,
+                "datetime": datetime.fromtimestamp(0, timezone.utc),
+                "float": 1.5,
+                "int": 1,
+                "str": "1",
+                "list": [1],
+            }
+        )
+
+    @pytest.mark.parametrize("type_", ["bool", "datetime", "float", "int", "str"])
+    def test(self, conf, type_):
+        get = getattr(conf, f"get_{type_}")
+        assert get(type_) is conf._conf[type_]
+        assert get("non") is None
+        assert get("non", "default") == "default"
+        with pytest.raises(TypeError):
+            get("list")
+
+    def test_cast(self, conf):
+        assert conf.get_int("str", cast=True) == 1
+        assert conf.get_float("int", cast=True) == 1.0
+        assert conf.get_str("float", cast=True) == "1.5"
+        assert conf.get_bool("int", cast=True) is True
+        assert conf.get_datetime("int", cast=True) == datetime.fromtimestamp(
+            1, timezone.utc
+        )
+
+    def test_wrong_type(self, conf):
+        with pytest.raises(TypeError):
+            conf.get_int("str")
+        with pytest.raises(TypeError):
+            conf.get_str("int")
+
+    def test_cast_error(self, conf):
+        conf.update({"str": "x"})
+        with pytest.raises(ValueError):
+            conf.get_int("str", cast=True)
+        with pytest.raises(ValueError):
+            conf.get_bool("str", cast=True)
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [("true", True), ("False", False), ("0", False), ("yes", True), ("x", None)],
+    )
+    def test_cast_bool(self, conf, value, expected):
+        conf.update({"str": value})
+        if expected is None:
+            with pytest.raises(ValueError):
+                conf.get_bool("str", cast=True)
+        else:
+            assert conf.get_bool("str", cast=True) is expected
+
+    def test_bool_not_int(self, conf):
+        with pytest.raises(TypeError):
+            conf.get_int("bool")
+        with pytest.raises(TypeError):
+            conf.get_float("bool")
+        assert conf.get_int("bool", cast=True) == 1
+
 
 class TestReplace(TestCase):
     newconf = {
@@ -209,7 +429,734 @@ class TestUpdate(TestCase):
         conf.update({("b", "d"): -1})
         assert conf.get("b.d") == -1
 
+    @pytest.mark.parametrize("value", [False, 0, "", {}])
+    def test_remove_falsy(self, value):
+        conf = ResConfig(self.default)
+        conf.update({"b": value})
+        called = []
+        conf.register("b", lambda *args: called.append(args))
+        conf.update({"b": Flag.REMOVE})
+        assert "b" not in conf
+        assert called == [(Action.REMOVED, value, Flag.REMOVE)]
+
     def test_invalid_args(self):
         conf = ResConfig(self.default)
         with pytest.raises(TypeError):
             conf.update(3)
+
+    @pytest.mark.parametrize("concurrency", [None, "copy-on-write", "lock"])
+    def test_watcher_mutating(self, concurrency):
+        conf = ResConfig(self.default, concurrency=concurrency, history=3)
+        received = []
+
+        def mutate(action, oldval, newval):
+            newval["z1"] = -1
+            received.append(newval)
+
+        conf.register("x3.y3", mutate)
+        snapshot = conf.snapshot()
+        conf.update({"x3.y3.z1": 10})
+        assert received == [{"z1": -1, "z2": self.default["x3"]["y3"]["z2"]}]
+        assert conf["x3.y3.z1"] == 10
+        assert conf.snapshot()["x3"]["y3"]["z1"] == 10
+        assert snapshot["x3"]["y3"]["z1"] == self.default["x3"]["y3"]["z1"]
+        conf.rollback()
+        assert conf["x3.y3.z1"] == self.default["x3"]["y3"]["z1"]
+
+    @pytest.mark.parametrize("concurrency", [None, "copy-on-write", "lock"])
+    def test_watcher_updating(self, concurrency):
+        conf = ResConfig({"a": 1, "b": 1, "z": 0}, concurrency=concurrency, history=3)
+        conf.register("a", lambda action, old, new: conf.update({"z": new}))
+        generation = conf.generation()
+        conf.update({"b": 2, "a": 2})
+        assert conf._asdict() == {"a": 2, "b": 2, "z": 2}
+        assert conf.snapshot().asdict() == conf._asdict()
+        assert conf.changed_since(generation, "b")
+        assert conf.generation("z") == generation + 2
+        conf.rollback()
+        assert conf._asdict() == {"a": 2, "b": 2, "z": 0}
+
+
+class TestUnchanged(TestCase):
+    @pytest.fixture
+    def conf(self):
+        conf = ResConfig(self.default)
+        conf.called = []
+        conf.register("x3.y3", lambda *args: conf.called.append(args))
+        yield conf
+
+    def test_load(self, conf):
+        generation = conf._generation
+        conf.load()
+        conf.update(deepcopy(self.default))
+        assert conf._generation == generation
+        assert not conf.called
+
+    def test_changed(self, conf):
+        conf.update({"x3.y3.z1": -1})
+        assert conf._generation == 2
+        assert len(conf.called) == 1
+
+
+class TestLazyLoad(TestCase):
+    @pytest.fixture
+    def conf(self):
+        conf = ResConfig(self.default, load_on_init="lazy")
+        assert not conf._conf
+        yield conf
+
+    @pytest.mark.parametrize(
+        "read",
+        [
+            lambda c: "x1" in c,
+            lambda c: c["x1"],
+            lambda c: c.get("x1"),
+            lambda c: c.view(),
+            lambda c: c.accessor("x1")(),
+            lambda c: c.snapshot(),
+            lambda c: c._asdict(),
+        ],
+    )
+    def test_read(self, conf, read):
+        read(conf)
+        assert conf._asdict() == self.default
+        assert not conf._load_pending
+
+    def test_update(self, conf):
+        conf.update({"x1": 10})
+        assert conf["x1"] == 10
+        assert conf["x2"] == self.default["x2"]
+
+    def test_load(self, conf):
+        conf.load()
+        assert not conf._load_pending
+        with mock.patch.object(conf, "load") as load:
+            conf["x1"]
+        load.assert_not_called()
+
+    def test_error(self, conf):
+        with mock.patch.object(conf, "_prepare_config", side_effect=OSError):
+            with pytest.raises(OSError):
+                conf["x1"]
+        assert conf._load_pending
+        assert conf["x1"] == self.default["x1"]
+
+    def test_watcher_reading(self, conf):
+        seen = []
+        conf.register("x3.y1", lambda *args: seen.append(conf.get("x3.y1")))
+        thread = threading.Thread(target=conf.get, args=("x3.y1",), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert seen == [self.default["x3"]["y1"]]
+        assert not conf._load_pending
+
+    def test_concurrent(self, conf):
+        prepare = conf._prepare_config
+        barrier = threading.Barrier(8, timeout=5)
+        loaded = []
+        results = []
+
+        def slow_prepare():
+            loaded.append(None)
+            time.sleep(0.05)
+            return prepare()
+
+        def read():
+            barrier.wait()
+            results.append(conf["x1"])
+
+        with mock.patch.object(conf, "_prepare_config", side_effect=slow_prepare):
+            threads = [threading.Thread(target=read) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert len(loaded) == 1
+        assert results == [self.default["x1"]] * 8
+
+
+class TestAsyncLoad(TestCase):
+    @pytest.fixture
+    def filename(self, tmp_path):
+        filename = str(tmp_path / "conf.json")
+        ResConfig({"x3.y3.z1": 10}).save_to_file(filename)
+        yield filename
+
+    def test_aload(self, run, filename):
+        conf = ResConfig(self.default, config_files=[filename], load_on_init=False)
+        run(conf.aload())
+        assert conf["x3.y3.z1"] == 10
+        assert conf["x1"] == self.default["x1"]
+
+    def test_lazy(self, run, filename):
+        conf = ResConfig(self.default, config_files=[filename], load_on_init="lazy")
+        run(conf.aload())
+        assert not conf._load_pending
+
+    def test_coalesced(self, run, filename):
+        conf = ResConfig(self.default, config_files=[filename], load_on_init=False)
+
+        async def main():
+            await asyncio.gather(*[conf.aload() for _ in range(5)])
+
+        with mock.patch.object(
+            conf, "_ResConfig__read_files", wraps=conf._ResConfig__read_files
+        ) as read_files:
+            run(main())
+        assert read_files.call_count == 2
+        assert conf["x3.y3.z1"] == 10
+
+
+class TestTransaction(TestCase):
+    @pytest.fixture
+    def conf(self):
+        conf = ResConfig(self.default)
+        conf.called = []
+        conf.register("x3.y3.z1", lambda *args: conf.called.append(args))
+        yield conf
+
+    def test_falsy_unchanged(self):
+        conf = ResConfig({"flag": False, "n": 0, "x1": 1})
+        called = []
+        for key in ("flag", "n"):
+            conf.register(key, lambda *args: called.append(args))
+        with conf.transaction():
+            conf.update({"x1": 3})
+        assert conf["x1"] == 3
+        assert called == []
+
+    def test_load_aborted(self, tmp_path):
+        filename = str(tmp_path / "conf.json")
+        conf = ResConfig(self.default, config_files=[filename])
+        layers = conf._layers
+        ResConfig({"x1": 10}).save_to_file(filename)
+        with suppress(ZeroDivisionError):
+            with conf.transaction():
+                conf.load()
+                1 / 0
+        assert conf._layers is layers
+        assert conf["x1"] == self.default["x1"]
+
+    def test_batched(self, conf):
+        with conf.transaction():
+            conf.update({"x3.y3.z1": 10})
+            assert conf["x3.y3.z1"] == 3
+            conf.update({"x3.y3.z1": 20, "x1": 2})
+            assert not conf.called
+        assert conf["x3.y3.z1"] == 20
+        assert conf["x1"] == 2
+        assert conf.called == [(Action.MODIFIED, 3, 20)]
+
+    def test_reverted(self, conf):
+        generation = conf._generation
+        with conf.transaction():
+            conf.update({"x3.y3.z1": 10})
+            conf.update({"x3.y3.z1": 3})
+        assert conf._generation == generation
+        assert not conf.called
+
+    def test_error(self, conf):
+        with pytest.raises(ValueError):
+            with conf.transaction():
+                conf.update({"x3.y3.z1": 10})
+                raise ValueError
+        assert conf["x3.y3.z1"] == 3
+        assert not conf.called
+        conf.update({"x3.y3.z1": 10})
+        assert conf.called == [(Action.MODIFIED, 3, 10)]
+
+    def test_replace(self, conf):
+        with conf.transaction():
+            conf.update({"x1": 2})
+            conf.replace({"x3": {"y3": {"z1": 10}}})
+            conf.update({"x2": "text"})
+        assert conf._asdict() == {"x2": "text", "x3": {"y3": {"z1": 10}}}
+        assert conf.called == [(Action.MODIFIED, 3, 10)]
+
+    def test_remove(self, conf):
+        with conf.transaction():
+            conf.update({"x3.y3.z1": Flag.REMOVE})
+            assert "x3.y3.z1" in conf
+        assert "x3.y3.z1" not in conf
+        assert conf.called == [(Action.REMOVED, 3, Flag.REMOVE)]
+
+    def test_nested(self, conf):
+        with conf.transaction():
+            with conf.transaction():
+                conf.update({"x3.y3.z1": 10})
+            assert conf["x3.y3.z1"] == 3
+        assert conf.called == [(Action.MODIFIED, 3, 10)]
+
+    def test_load(self, conf, tmp_path):
+        filename = str(tmp_path / "conf.json")
+        ResConfig({"x3": {"y3": {"z1": 10}}}).save_to_file(filename)
+        with conf.transaction():
+            conf.update_from_file(filename)
+            conf.update({"x1": 2})
+        assert conf["x3.y3.z1"] == 10
+        assert conf["x1"] == 2
+        assert conf.called == [(Action.MODIFIED, 3, 10)]
+
+    @pytest.mark.parametrize("concurrency", [None, "copy-on-write", "lock"])
+    @pytest.mark.parametrize("abort", [False, True])
+    def test_other_thread(self, concurrency, abort):
+        conf = ResConfig(self.default, concurrency=concurrency)
+        other = threading.Thread(target=conf.update, args=({"x2": "other"},))
+        with suppress(ZeroDivisionError):
+            with conf.transaction():
+                conf.update({"x1": 10})
+                other.start()
+                other.join(0.05)
+                assert other.is_alive()  # Waits for the transaction
+                assert conf["x2"] == self.default["x2"]
+                if abort:
+                    1 / 0
+        other.join()
+        assert conf["x1"] == (self.default["x1"] if abort else 10)
+        assert conf["x2"] == "other"
+
+
+class TestCopyOnWrite(TestCase):
+    @pytest.fixture
+    def conf(self):
+        conf = ResConfig(self.default, concurrency="copy-on-write")
+        conf.called = []
+        conf.register("x3.y3", lambda *args: conf.called.append(args))
+        conf.register("x3.y3.z1", lambda *args: conf.called.append(args))
+        yield conf
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            ResConfig(concurrency="unknown")
+
+    def test_update(self, conf):
+        old = conf._conf
+        conf.update({"x3.y3.z1": 10, "x5": 1})
+        assert conf._conf is not old
+        assert old == self.default
+        assert conf["x3.y3.z1"] == 10
+        assert conf["x5"] == 1
+        assert conf.called == [
+            (Action.MODIFIED, 3, 10),
+            (Action.MODIFIED, old["x3.y3"], conf._conf["x3.y3"]),
+        ]
+        assert conf.called[1][1] is old["x3.y3"]
+
+    def test_same_as_in_place(self):
+        confs = [
+            ResConfig(self.default, concurrency=c) for c in ("copy-on-write", None)
+        ]
+        for c in confs:
+            c.called = []
+            for key in ("x3.y3", "x3.y3.z1"):
+                c.register(key, lambda *args, c=c: c.called.append(deepcopy(args)))
+            c.update({"x3.y3": {"z1": 10, "z3": 1}})
+            c.update({"x3.y3.z2": Flag.REMOVE})
+            c.replace({"x3": {"y3": {"z1": 20}}})
+            c.update({"x3": {"y3": {"z1": 20}}})
+        assert confs[0]._asdict() == confs[1]._asdict()
+        assert confs[0].called == confs[1].called
+
+    def test_watcher_sees_new_config(self, conf):
+        seen = []
+        conf.register("x1", lambda *args: seen.append(conf["x1"]))
+        conf.update({"x1": 10})
+        assert seen == [10]
+
+    def test_unchanged(self, conf):
+        old = conf._conf
+        conf.update(deepcopy(self.default))
+        assert conf._conf is old
+        assert not conf.called
+
+
+class TestThreadSafe(TestCase):
+    @pytest.fixture(params=["copy-on-write", "lock"])
+    def conf(self, request):
+        conf = ResConfig(self.default, concurrency=request.param)
+        conf.called = []
+        conf.register("x3.y3.z1", lambda *args: conf.called.append(args))
+        yield conf
+
+    def test_watcher_updates(self, conf):
+        def watcher(action, old, new):
+            conf.register("x1", lambda *args: conf.called.append(args))
+            conf.update({"x1": conf["x3.y3.z1"]})
+
+        conf.register("x3.y3.z1", watcher)
+        conf.update({"x3.y3.z1": 10})
+        assert conf["x1"] == 10
+        assert conf.called == [(Action.MODIFIED, 3, 10), (Action.MODIFIED, 1, 10)]
+
+    def test_reload(self, conf):
+        conf.register("x1", lambda *args: conf.update({"x2": "text"}))
+        conf.reload()
+        assert conf["x2"] == "text"
+        assert conf.called == [(Action.RELOADED, 3, 3)]
+
+    def test_error(self, conf):
+        def watcher(action, old, new):
+            raise ValueError
+
+        conf.register("x1", watcher)
+        with pytest.raises(ValueError):
+            conf.update({"x1": 10})
+        assert conf["x1"] == 10
+        conf.deregister("x1", watcher)
+        conf.update({"x1": 20})
+        assert conf["x1"] == 20
+
+    def test_concurrent_readers(self, conf):
+        configs = [
+            {"a": {"b": i, "c": {"d": -i, "e": str(i)}}, "f": [i] * 3} for i in range(2)
+        ]
+        conf.replace(configs[0])
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                value = conf._asdict()
+                if value not in configs:
+                    errors.append(value)
+                view = conf.view()
+                try:
+                    value = (view["a.b"], view["a.c.d"], view["f"][0])
+                except Exception:
+                    continue  # Stale
+                if -value[1] != value[0] or value[2] != value[0]:
+                    errors.append(value)
+
+        def write():
+            for i in range(500):
+                conf.replace(configs[i % 2])
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writers = [threading.Thread(target=write) for _ in range(2)]
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        done.set()
+        for t in readers:
+            t.join()
+        assert not errors
+
+
+class TestGeneration(TestCase):
+    @pytest.fixture
+    def conf(self):
+        yield ResConfig(self.default)
+
+    def test_unchanged(self, conf):
+        assert conf.generation() == 1
+        conf.load()
+        conf.reset()
+        conf.update({"x1": self.default["x1"]})
+        assert conf.generation() == 1
+        assert not conf.changed_since(1)
+
+    def test_changed(self, conf):
+        conf.update({"x3.y3.z1": 10})
+        assert conf.generation() == 2
+        assert conf.changed_since(1)
+        assert conf.generation("x3") == 2
+        assert conf.generation("x3.y3") == 2
+        assert conf.generation("x3.y3.z1") == 2
+        assert conf.generation("x3.y3.z2") == 1
+        assert conf.generation("x3.y4") == 1
+        assert conf.generation("x4") == 1
+        assert conf.changed_since(1, "x3")
+        assert not conf.changed_since(1, "x4")
+
+    def test_replaced(self, conf):
+        conf.replace({"x1": 1, "x3": 1})
+        assert conf.generation() == 2
+        assert conf.generation("x1") == 1
+        assert conf.generation("x3") == 2
+        assert conf.generation("x3.y3.z1") == 2
+        assert conf.generation("x4.y1") == 2
+
+    def test_added(self, conf):
+        assert conf.generation("x5.y1") == 0
+        conf.update({"x5.y1": 1})
+        assert conf.generation("x5.y1") == 2
+        assert conf.generation("x5") == 2
+
+    def test_transaction(self, conf):
+        with conf.transaction():
+            conf.update({"x1": 2})
+            conf.update({"x2": "text"})
+        assert conf.generation() == 2
+        assert conf.generation("x1") == 2
+        assert conf.generation("x2") == 2
+
+    def test_removed(self, conf):
+        conf.update({"x5.y1.z1": 1})
+        conf.update({"x5": Flag.REMOVE})
+        assert conf.generation("x5") == 3
+        assert conf.generation("x5.y1.z1") == 3
+        assert "x5" not in conf._generations.children
+
+    def test_pruned(self, conf):
+        conf.update({"x3": 1})
+        assert conf.generation("x3.y3.z1") == 2
+        assert not conf._generations.children["x3"].children
+
+    def test_bounded(self, conf):
+        for i in range(100):
+            conf.update({f"x5.y{i}": i + 1})
+            conf.update({f"x5.y{i}": Flag.REMOVE})
+        assert conf.generation("x5.y0") == 201  # No earlier than its removal
+        assert conf.generation("x5.y99") == 201
+        assert conf.generation("x1") == 1
+        assert not conf._generations.children["x5"].children
+
+
+class TestRollback(TestCase):
+    @pytest.fixture(params=[None, "copy-on-write", "lock"])
+    def conf(self, request):
+        yield ResConfig(self.default, history=3, concurrency=request.param)
+
+    def test_rollback(self, conf):
+        expected = conf._asdict()
+        conf.update({"x1": 10, "x3.y3.z1": 10, "x5.y1": 1})
+        conf.rollback()
+        assert conf._asdict() == expected
+        assert "x5" not in conf
+
+    def test_replaced(self, conf):
+        expected = conf._asdict()
+        conf.replace({"x1": 1, "x3": 1})
+        conf.rollback()
+        assert conf._asdict() == expected
+
+    def test_rollback_n(self, conf):
+        conf.update({"x1": 10})
+        expected = conf._asdict()
+        conf.update({"x1": 11})
+        conf.update({"x2": "text"})
+        conf.rollback(2)
+        assert conf._asdict() == expected
+        conf.rollback()
+        assert conf["x1"] == self.default["x1"]
+        with pytest.raises(IndexError):
+            conf.rollback()
+
+    def test_bounded(self, conf):
+        for i in range(10):
+            conf.update({"x1": i})
+        with pytest.raises(IndexError):
+            conf.rollback(4)
+        conf.rollback(3)
+        assert conf["x1"] == 6
+
+    def test_unchanged(self, conf):
+        conf.update({"x1": 10})
+        conf.update({"x1": 10})
+        conf.rollback()
+        assert conf["x1"] == self.default["x1"]
+
+    def test_watchers(self, conf):
+        watched = []
+        conf.update({"x1": 10})
+        conf.register("x1", lambda *args: watched.append(args))
+        conf.register("x3.y3", lambda *args: watched.append(args))
+        conf.rollback()
+        assert watched == [(Action.MODIFIED, 10, self.default["x1"])]
+
+    def test_shared(self, conf):
+        conf.update({"x1": 10})
+        previous, snapshot = conf._history[-1], conf.snapshot()
+        assert previous["x1"] != snapshot["x1"]
+        assert previous["x3"] is snapshot["x3"]
+
+    @pytest.mark.parametrize("value", [False, 0, "", {}])
+    def test_falsy(self, conf, value):
+        expected, n = conf._asdict(), len(conf._history)
+        conf.update({"x5": value})
+        conf.rollback()
+        assert conf._asdict() == expected
+        assert len(conf._history) == n
+
+    def test_failed(self, conf):
+        conf.update({"x1": 10})
+        n = len(conf._history)
+        with mock.patch.object(
+            ResConfig, "_ResConfig__update", side_effect=ZeroDivisionError
+        ):
+            with pytest.raises(ZeroDivisionError):
+                conf.rollback()
+        assert len(conf._history) == n
+        assert conf["x1"] == 10
+        conf.rollback()
+        assert conf["x1"] == self.default["x1"]
+
+    def test_nothing_changed(self, conf):
+        conf.update({"x1": 10})
+        conf.update({"x1": self.default["x1"]})
+        n = len(conf._history)
+        conf.rollback(2)
+        assert len(conf._history) == n
+
+    def test_no_history(self):
+        conf = ResConfig(self.default)
+        conf.update({"x1": 10})
+        with pytest.raises(IndexError):
+            conf.rollback()
+
+    def test_transaction(self, conf):
+        with conf.transaction():
+            with pytest.raises(RuntimeError):
+                conf.rollback()
+
+
+class TestCopies(TestCase):
+    @pytest.fixture
+    def conf(self):
+        conf = ResConfig(self.default)
+        with mock.patch("resconfig.resconfig.deepcopy", side_effect=deepcopy) as m:
+            conf.deepcopy = m
+            yield conf
+
+    def test_without_watchers(self, conf):
+        conf.update({"x3.y3.z1": -1, "x4": {"y5": {"z1": 1}}})
+        newconf = deepcopy(self.default)
+        newconf["x3"]["y4"] = 1
+        conf.replace(newconf)
+        conf.deepcopy.assert_not_called()
+
+    def test_with_watcher(self, conf):
+        watcher = mock.Mock()
+        conf.register("x3.y3", watcher)
+        conf.update({"x3.y3.z1": -1, "x4.y3.z1": -1})
+        assert conf.deepcopy.call_count == 2  # The old and new values at x3.y3
+        watcher.assert_called_once_with(
+            Action.MODIFIED, self.default["x3"]["y3"], conf._conf["x3.y3"]
+        )
+        assert watcher.call_args[0][2] is not conf._conf["x3.y3"]
+
+    def test_watchers_unchanged(self, conf):
+        conf.register("x3.y3.z1", mock.Mock())
+        keys = list(conf._watchers.allkeys())
+        conf.update({"x3.y3.z1": -1, "a.b.c": 1, "x4.y3": {"z3": 1}})
+        assert list(conf._watchers.allkeys()) == keys
+
+
+class TestFingerprint(TestCase):
+    def test(self):
+        conf = ResConfig(self.default)
+        fingerprint = conf.fingerprint()
+        assert fingerprint == ResConfig(deepcopy(self.default)).fingerprint()
+        conf.update({"x3.y3.z1": -1})
+        assert conf.fingerprint() != fingerprint
+        conf.update({"x3.y3.z1": self.default["x3"]["y3"]["z1"]})
+        assert conf.fingerprint() == fingerprint
+
+
+class TestSnapshot(TestCase):
+    def test(self):
+        conf = ResConfig(self.default)
+        snapshot = conf.snapshot()
+        assert snapshot == self.default
+        assert conf.snapshot() is snapshot
+
+    def test_structural_sharing(self):
+        conf = ResConfig(self.default)
+        old = conf.snapshot()
+        conf.update({"x3.y3.z1": -1, "x5.y1": 1})
+        new = conf.snapshot()
+        assert new == conf._conf
+        assert old == self.default
+        assert new["x4"] is old["x4"]
+        assert new["x3.y4"] is old["x3.y4"]
+        assert new["x3.y3"] is not old["x3.y3"]
+
+    def test_replace(self):
+        conf = ResConfig(self.default)
+        old = conf.snapshot()
+        newconf = deepcopy(self.default)
+        newconf["x3"]["y1"] = {"a": 1}
+        del newconf["x4"]["y3"]
+        conf.replace(newconf)
+        new = conf.snapshot()
+        assert new == newconf
+        assert new["x4.y4"] is old["x4.y4"]
+
+    def test_unload(self):
+        conf = ResConfig(self.default)
+        conf.snapshot()
+        conf.unload()
+        assert conf.snapshot() == {}
+
+    @pytest.mark.parametrize("concurrency", [None, "copy-on-write", "lock"])
+    def test_concurrent_update(self, concurrency):
+        conf = ResConfig(self.default, concurrency=concurrency)
+        other = threading.Thread(target=conf.update, args=({"x1": 10},))
+        frozen = FrozenONDict
+
+        def build(*args):
+            other.start()
+            other.join(0.05)
+            assert other.is_alive()  # Waits for the snapshot
+            return frozen(*args)
+
+        with mock.patch("resconfig.resconfig.FrozenONDict", side_effect=build):
+            snapshot = conf.snapshot()
+        other.join()
+        assert snapshot["x1"] == self.default["x1"]
+        assert conf.snapshot()["x1"] == 10
+
+
+class TestOndictClass(TestCase):
+    def test_indexed(self):
+        conf = ResConfig(self.default, ondict_class=IndexedONDict)
+        assert type(conf._conf) is IndexedONDict
+        assert conf._asdict() == self.default
+        conf.update({"x3.y3.z1": -1, "x5.y1": 1})
+        conf.replace({"x3": {"y3": {"z1": -2}}})
+        assert conf._asdict() == {"x3": {"y3": {"z1": -2}}}
+        assert conf._conf._index == {
+            ("x3",): conf._conf["x3"],
+            ("x3", "y3"): conf._conf["x3.y3"],
+            ("x3", "y3", "z1"): -2,
+        }
+
+    def assert_nodes(self, conf, cls):
+        nodes = [conf._conf]
+        while nodes:
+            node = nodes.pop()
+            assert type(node) is cls
+            nodes.extend(v for v in node.values() if isinstance(v, dict))
+
+    def test_dict(self):
+        conf = ResConfig(self.default, ondict_class=DictONDict)
+        self.assert_nodes(conf, DictONDict)
+        conf.update({"x3.y3.z1": -1, "x5.y1": 1, "x1": {"y1": 1}})
+        self.assert_nodes(conf, DictONDict)
+        assert conf["x5.y1"] == 1
+        conf.replace({"x3": {"y3": {"z1": -2}}})
+        assert conf._asdict() == {"x3": {"y3": {"z1": -2}}}
+
+    def test_default_class(self, monkeypatch):
+        monkeypatch.setattr(ResConfig, "ondict_class", DictONDict)
+        conf = ResConfig(self.default)
+        self.assert_nodes(conf, DictONDict)
+        conf = ResConfig(self.default, ondict_class=ONDict)
+        self.assert_nodes(conf, ONDict)
+
+
+class TestDeepConfig:
+    @pytest.fixture
+    def depth(self, recursion_limit):
+        yield recursion_limit + 50
+
+    def test_update(self, depth):
+        key = ("k",) * depth
+        conf = ResConfig(deep_config(depth))
+        assert conf[key] == 0
+        conf.update({key: 1})
+        assert conf[key] == 1
+        conf.replace(deep_config(depth, leaf=2))
+        assert conf[key] == 2
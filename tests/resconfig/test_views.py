@@ -0,0 +1,110 @@
+import pytest
+
+from resconfig import ResConfig
+from resconfig.views import Accessor
+from resconfig.views import ConfigView
+from resconfig.views import StaleViewError
+
+from .test_resconfig import TestCase
+
+
+class TestConfigView(TestCase):
+    @pytest.fixture
+    def conf(self):
+        yield ResConfig(self.default)
+
+    def test_read(self, conf):
+        view = conf.view("x3")
+        assert isinstance(view, ConfigView)
+        assert view == self.default["x3"]
+        assert view["y3.z1"] == 3
+        assert "y3.z1" in view
+        assert view.get("y5", "default") == "default"
+        assert len(view) == len(self.default["x3"])
+        assert list(view) == list(self.default["x3"])
+
+    def test_whole_config(self, conf):
+        assert conf.view() == self.default
+
+    def test_no_copy(self, conf):
+        view = conf.view("x3")
+        assert view._node is conf._conf["x3"]
+        assert view["y3"]._node is conf._conf["x3.y3"]
+
+    def test_nested_view(self, conf):
+        assert isinstance(conf.view("x3")["y3"], ConfigView)
+
+    def test_read_only(self, conf):
+        view = conf.view("x3")
+        with pytest.raises(TypeError):
+            view["y1"] = 0
+        with pytest.raises(TypeError):
+            del view["y1"]
+
+    def test_stale(self, conf):
+        view = conf.view("x3")
+        nested = view["y3"]
+        assert not view.stale
+        conf.update({"x4.y1": -1})
+        assert view.stale
+        with pytest.raises(StaleViewError):
+            view["y1"]
+        with pytest.raises(StaleViewError):
+            list(nested)
+        assert conf.view("x3")["y1"] == 2
+
+    def test_not_stale_on_noop(self, conf):
+        view = conf.view("x3")
+        conf.update({"x3.y1": 2})
+        assert view["y1"] == 2
+
+    @pytest.mark.parametrize("key, expected", [("x1", TypeError), ("x9", KeyError)])
+    def test_error(self, conf, key, expected):
+        with pytest.raises(expected):
+            conf.view(key)
+
+    def test_asdict(self, conf):
+        d = conf.view("x3").asdict()
+        assert type(d) is dict
+        assert d == self.default["x3"]
+
+
+class TestAccessor(TestCase):
+    @pytest.fixture
+    def conf(self):
+        yield ResConfig(self.default)
+
+    def test_leaf(self, conf):
+        accessor = conf.accessor("x3.y3.z1")
+        assert isinstance(accessor, Accessor)
+        assert accessor.key == ("x3", "y3", "z1")
+        assert accessor() == 3
+        conf.update({"x3.y3.z1": -1})
+        assert accessor() == -1
+
+    def test_mapping(self, conf):
+        accessor = conf.accessor("x3")
+        view = accessor()
+        assert isinstance(view, ConfigView)
+        assert view == self.default["x3"]
+        assert accessor() is view
+        conf.update({"x3.y1": -1})
+        assert view.stale
+        assert accessor()["y1"] == -1
+
+    def test_cached(self, conf):
+        accessor = conf.accessor("x3.y3.z1")
+        accessor()
+        # Changes bypassing the update methods are not seen until the next update.
+        conf._conf["x3.y3.z1"] = 0
+        assert accessor() == 3
+        conf.update({"x1": -1})
+        assert accessor() == 0
+
+    def test_missing(self, conf):
+        accessor = conf.accessor("x9.y1", "default")
+        assert accessor() == "default"
+        conf.update({"x9.y1": 1})
+        assert accessor() == 1
+        conf.replace({"x9": 1})
+        assert accessor() == "default"
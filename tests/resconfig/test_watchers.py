@@ -7,6 +7,7 @@ from resconfig.actions import Action
 from resconfig.ondict import get
 from resconfig.resconfig import Flag
 
+from .conftest import deep_config
 from .test_resconfig import TestCase
 
 
@@ -120,6 +121,17 @@ class TestReload(TestCase):
                 assert func.call_count == 2
 
 
+class TestReloadDeepConfig:
+    def test(self, recursion_limit):
+        depth = recursion_limit + 50
+        key = ("k",) * depth
+        watcher = mock.Mock()
+        conf = ResConfig(deep_config(depth), watchers={key: watcher})
+        conf.reload()
+        watcher.assert_called_with(Action.RELOADED, 0, 0)
+        assert watcher.call_count == 2
+
+
 class TestUpdate(TestCase):
     @pytest.mark.parametrize(
         "key, newval",